@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def inline_thumbnails(settings):
+    """Миниатюры в тестах генерируются синхронно, без пула потоков."""
+    settings.THUMBNAIL_WORKERS = 0
@@ -0,0 +1,6 @@
+class BadRequest(Exception):
+    """Некорректные параметры запроса, api_view отвечает на них 400."""
+
+
+class InvalidCursor(BadRequest):
+    pass
@@ -0,0 +1,70 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from .exceptions import InvalidCursor
+
+
+def encode_cursor(values):
+    raw = json.dumps([str(value) for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, fields):
+    """Значения ключа из токена; для битого токена — None."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw.decode())
+        if not isinstance(values, list) or len(values) != len(fields):
+            return None
+        return [
+            field.to_python(value) for field, value in zip(fields, values)
+        ]
+    except (ValueError, TypeError, UnicodeDecodeError, binascii.Error,
+            ValidationError):
+        return None
+
+
+class KeysetPaginator:
+    """Курсорная навигация вперёд по убывающему ключу без OFFSET и COUNT.
+
+    key — имена полей модели, последним должно идти уникальное поле.
+    Курсор хранит значения ключа последней строки страницы.
+    """
+
+    def __init__(self, queryset, key, per_page):
+        self.queryset = queryset
+        self.key = key
+        self.per_page = per_page
+        self.fields = [queryset.model._meta.get_field(name) for name in key]
+
+    def _after(self, values):
+        condition = Q()
+        for number, (name, value) in enumerate(zip(self.key, values)):
+            equal = dict(zip(self.key[:number], values))
+            condition |= Q(**equal, **{f'{name}__lt': value})
+        if len(self.key) > 1:
+            # Как и в CursorPaginator: условие по первому полю ключа
+            # даёт поиск по индексу, одно OR приводит к сканированию.
+            condition &= Q(**{f'{self.key[0]}__lte': values[0]})
+        return condition
+
+    def _position(self, obj):
+        return [getattr(obj, field.attname) for field in self.fields]
+
+    def page(self, token=None):
+        """Возвращает (строки, курсор следующей страницы или None)."""
+        rows = self.queryset.order_by(*[f'-{name}' for name in self.key])
+        if token:
+            values = decode_cursor(token, self.fields)
+            if values is None:
+                raise InvalidCursor('Некорректный курсор.')
+            rows = rows.filter(self._after(values))
+        rows = list(rows[:self.per_page + 1])
+        if len(rows) <= self.per_page:
+            return rows, None
+        rows = rows[:self.per_page]
+        return rows, encode_cursor(self._position(rows[-1]))
@@ -0,0 +1,109 @@
+from collections import namedtuple
+from functools import lru_cache
+from operator import attrgetter
+
+from .exceptions import BadRequest
+
+Field = namedtuple('Field', ['get', 'related'], defaults=[()])
+
+
+def _date(name):
+    get = attrgetter(name)
+    return lambda obj: get(obj).isoformat()
+
+
+def _image(obj):
+    return obj.image.url if obj.image else None
+
+
+def _group(post):
+    return post.group.slug if post.group_id else None
+
+
+class Serializer:
+    """Сериализатор, собранный заранее для набора полей.
+
+    Поле описывает функция от объекта и связи, которые ей нужны в
+    select_related. Для каждого набора полей compile() один раз строит
+    кортеж функций и план запроса, дальше объект превращается в словарь
+    без обхода _meta и getattr по именам.
+    """
+    fields = {}
+
+    def __init__(self, names):
+        self.names = names
+        self.getters = tuple(self.fields[name].get for name in names)
+        self.related = sorted(
+            {related for name in names
+             for related in self.fields[name].related}
+        )
+
+    @classmethod
+    def compile(cls, names=None):
+        """names — список полей или None для всех; неизвестные — BadRequest.
+
+        Поля идут в порядке объявления, поэтому наборов не больше
+        2 ** len(fields) и кэш ограничен.
+        """
+        if not names:
+            return cls._compiled(tuple(cls.fields))
+        unknown = [name for name in names if name not in cls.fields]
+        if unknown:
+            raise BadRequest(f'Неизвестные поля: {", ".join(unknown)}')
+        return cls._compiled(
+            tuple(name for name in cls.fields if name in names))
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _compiled(cls, names):
+        return cls(names)
+
+    def plan(self, queryset):
+        # select_related() без аргументов тянет все связи.
+        if self.related:
+            return queryset.select_related(*self.related)
+        return queryset
+
+    def __call__(self, obj):
+        return dict(zip(self.names, [get(obj) for get in self.getters]))
+
+
+class PostSerializer(Serializer):
+    fields = {
+        'id': Field(attrgetter('pk')),
+        'text': Field(attrgetter('text')),
+        'author': Field(attrgetter('author.username'), ('author',)),
+        'group': Field(_group, ('group',)),
+        'image': Field(_image),
+        'comments_count': Field(attrgetter('comments_count')),
+        'pub_date': Field(_date('pub_date')),
+        'updated_at': Field(_date('updated_at')),
+    }
+
+
+class GroupSerializer(Serializer):
+    fields = {
+        'id': Field(attrgetter('pk')),
+        'title': Field(attrgetter('title')),
+        'slug': Field(attrgetter('slug')),
+        'description': Field(attrgetter('description')),
+        'pub_date': Field(_date('pub_date')),
+    }
+
+
+class CommentSerializer(Serializer):
+    fields = {
+        'id': Field(attrgetter('pk')),
+        'post': Field(attrgetter('post_id')),
+        'author': Field(attrgetter('author.username'), ('author',)),
+        'text': Field(attrgetter('text')),
+        'pub_date': Field(_date('pub_date')),
+    }
+
+
+class FollowSerializer(Serializer):
+    fields = {
+        'id': Field(attrgetter('pk')),
+        'user': Field(attrgetter('user.username'), ('user',)),
+        'author': Field(attrgetter('author.username'), ('author',)),
+    }
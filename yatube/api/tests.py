@@ -0,0 +1,130 @@
+from unittest import mock
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {number}', slug=f'slug-{number}',
+                description='Описание')
+            for number in range(3)
+        ]
+        cls.authors = [
+            User.objects.create_user(username=f'author-{number}')
+            for number in range(3)
+        ]
+        cls.posts = [
+            Post.objects.create(
+                author=author, group=group, text=f'Пост {author.username}')
+            for author in cls.authors for group in cls.groups
+        ]
+        cls.post = cls.posts[0]
+        for author in cls.authors:
+            Comment.objects.create(post=cls.post, author=author, text='Ок')
+            Follow.objects.create(user=cls.user, author=author)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_query_counts(self):
+        """Число запросов каждого эндпоинта не зависит от числа объектов."""
+        endpoints = {
+            reverse('api:post_list'): 1,
+            reverse('api:post_detail', args=[self.post.pk]): 1,
+            reverse('api:comment_list', args=[self.post.pk]): 2,
+            reverse('api:group_list'): 1,
+            reverse('api:group_detail', args=[self.groups[0].slug]): 1,
+        }
+        for url, queries in endpoints.items():
+            with self.subTest(url=url), self.assertNumQueries(queries):
+                self.assertEqual(self.client.get(url).status_code, 200)
+        # Пользователь плюс сама выборка, сессия читается из кэша.
+        with self.assertNumQueries(2):
+            self.authorized_client.get(reverse('api:follow_list'))
+
+    def test_post_fields(self):
+        """Пост сериализуется со всеми полями по умолчанию."""
+        response = self.client.get(
+            reverse('api:post_detail', args=[self.post.pk]))
+        data = response.json()
+        self.assertEqual(data['id'], self.post.pk)
+        self.assertEqual(data['author'], self.post.author.username)
+        self.assertEqual(data['group'], self.post.group.slug)
+        self.assertIsNone(data['image'])
+        self.assertEqual(data['comments_count'], 3)
+
+    def test_sparse_fieldsets(self):
+        """?fields оставляет только запрошенные поля и лишние JOIN."""
+        url = reverse('api:post_list')
+        with self.assertNumQueries(1) as context:
+            data = self.client.get(url, {'fields': 'text,id'}).json()
+        self.assertNotIn('JOIN', context.captured_queries[0]['sql'])
+        self.assertEqual(list(data['results'][0]), ['id', 'text'])
+        response = self.client.get(url, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['detail'])
+
+    @mock.patch('api.views.API_PAGE_SIZE', 4)
+    def test_cursor_pagination(self):
+        """Курсор проходит все посты без повторов и пропусков."""
+        url = reverse('api:post_list')
+        seen = []
+        response = self.client.get(url, {'fields': 'id'}).json()
+        while True:
+            seen.extend(row['id'] for row in response['results'])
+            if not response['next']:
+                break
+            response = self.client.get(response['next']).json()
+        expected = list(Post.objects.order_by(
+            '-pub_date', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_filters(self):
+        """Посты фильтруются по автору и группе."""
+        response = self.client.get(reverse('api:post_list'), {
+            'author': self.authors[1].username,
+            'group': self.groups[2].slug,
+        })
+        results = response.json()['results']
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['text'], 'Пост author-1')
+
+    def test_errors(self):
+        """Ошибки отдаются JSON, запись запрещена."""
+        cases = {
+            reverse('api:post_detail', args=[0]): 404,
+            reverse('api:group_detail', args=['missing']): 404,
+            reverse('api:comment_list', args=[0]): 404,
+            reverse('api:follow_list'): 401,
+            reverse('api:post_list') + '?cursor=broken': 400,
+            reverse('api:post_list') + '?limit=many': 400,
+        }
+        for url, status in cases.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('detail', response.json())
+        response = self.authorized_client.post(reverse('api:post_list'))
+        self.assertEqual(response.status_code, 405)
+
+    def test_internal_value_error_not_bad_request(self):
+        """ValueError из кода представления — ошибка сервера, а не 400."""
+        with mock.patch('api.views.KeysetPaginator.page',
+                        side_effect=ValueError('сбой')):
+            with self.assertRaises(ValueError):
+                self.client.get(reverse('api:post_list'))
+
+    def test_follow_list(self):
+        """Подписки текущего пользователя."""
+        response = self.authorized_client.get(reverse('api:follow_list'))
+        authors = {row['author'] for row in response.json()['results']}
+        self.assertEqual(
+            authors, {author.username for author in self.authors})
@@ -0,0 +1,116 @@
+from functools import wraps
+
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_safe
+
+from posts.models import Follow, Group, Post
+
+from yatube.settings import API_MAX_PAGE_SIZE, API_PAGE_SIZE
+
+from .exceptions import BadRequest
+from .pagination import KeysetPaginator
+from .serializers import (CommentSerializer, FollowSerializer,
+                          GroupSerializer, PostSerializer)
+
+DATE_KEY = ('pub_date', 'id')
+ID_KEY = ('id',)
+
+
+def _json(data, status=200):
+    return JsonResponse(
+        data, status=status, json_dumps_params={'ensure_ascii': False})
+
+
+def api_view(view_func):
+    """Только чтение; ошибки отдаются JSON, а не HTML-страницами."""
+    @require_safe
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view_func(request, *args, **kwargs)
+        except Http404:
+            return _json({'detail': 'Не найдено.'}, status=404)
+        except BadRequest as error:
+            return _json({'detail': str(error)}, status=400)
+    return wrapper
+
+
+def _serializer(request, serializer_class):
+    """Сериализатор для ?fields=id,text,... (sparse fieldsets)."""
+    fields = request.GET.get('fields')
+    names = [name for name in fields.split(',') if name] if fields else None
+    return serializer_class.compile(names)
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET.get('limit', API_PAGE_SIZE))
+    except ValueError:
+        raise BadRequest('limit должен быть числом.')
+    return min(max(size, 1), API_MAX_PAGE_SIZE)
+
+
+def _list(request, queryset, serializer_class, key):
+    serialize = _serializer(request, serializer_class)
+    paginator = KeysetPaginator(
+        serialize.plan(queryset), key, _page_size(request))
+    rows, cursor = paginator.page(request.GET.get('cursor'))
+    next_url = None
+    if cursor:
+        query = request.GET.copy()
+        query['cursor'] = cursor
+        next_url = request.build_absolute_uri(
+            f'{request.path}?{query.urlencode()}')
+    return _json({
+        'results': [serialize(row) for row in rows],
+        'next': next_url,
+    })
+
+
+def _detail(request, queryset, serializer_class, **lookup):
+    serialize = _serializer(request, serializer_class)
+    return _json(serialize(
+        get_object_or_404(serialize.plan(queryset), **lookup)))
+
+
+@api_view
+def post_list(request):
+    posts = Post.objects.all()
+    author = request.GET.get('author')
+    if author:
+        posts = posts.filter(author__username=author)
+    group = request.GET.get('group')
+    if group:
+        posts = posts.filter(group__slug=group)
+    return _list(request, posts, PostSerializer, DATE_KEY)
+
+
+@api_view
+def post_detail(request, post_id):
+    return _detail(request, Post.objects.all(), PostSerializer, pk=post_id)
+
+
+@api_view
+def comment_list(request, post_id):
+    post = get_object_or_404(Post.objects.only('id'), pk=post_id)
+    return _list(request, post.comments.all(), CommentSerializer, DATE_KEY)
+
+
+@api_view
+def group_list(request):
+    return _list(request, Group.objects.all(), GroupSerializer, ID_KEY)
+
+
+@api_view
+def group_detail(request, slug):
+    return _detail(request, Group.objects.all(), GroupSerializer, slug=slug)
+
+
+@api_view
+def follow_list(request):
+    """Подписки текущего пользователя."""
+    if not request.user.is_authenticated:
+        return _json({'detail': 'Нужна авторизация.'}, status=401)
+    follows = Follow.objects.filter(user=request.user)
+    return _list(request, follows, FollowSerializer, ID_KEY)
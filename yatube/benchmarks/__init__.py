@@ -0,0 +1,17 @@
+import os
+import sys
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_PATH = os.path.join(BENCHMARKS_DIR, 'benchmark.sqlite3')
+
+
+def setup_django(db_path=DEFAULT_DB_PATH):
+    """Настраивает Django на отдельную базу, чтобы не трогать рабочую."""
+    sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.DEBUG = False
+
+    import django
+    django.setup()
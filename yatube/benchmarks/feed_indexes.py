@@ -0,0 +1,135 @@
+"""Планы и время запросов лент до и после миграции 0014_feed_indexes.
+
+Запуск из каталога yatube:
+
+    python -m benchmarks.feed_indexes --posts 1000000 --json indexes.json
+
+База создаётся по текущей схеме. Для замера «до» индексы 0014 удаляются,
+а вместо них ставятся одиночные индексы внешних ключей, которые были у
+постов до 0014 (их потом убрала 0017); остальная схема не меняется,
+поэтому более поздние миграции замеру не мешают.
+"""
+import argparse
+import importlib
+import json
+import os
+import statistics
+import time
+
+from . import DEFAULT_DB_PATH, setup_django
+
+FEED_INDEXES_MIGRATION = 'posts.migrations.0014_feed_indexes'
+
+
+def feed_indexes():
+    """[(модель, индекс)] из операций AddIndex миграции 0014."""
+    from django.apps import apps
+
+    migration = importlib.import_module(FEED_INDEXES_MIGRATION).Migration
+    return [
+        (apps.get_model('posts', operation.model_name), operation.index)
+        for operation in migration.operations
+    ]
+
+
+def foreign_key_indexes():
+    """Индексы author_id и group_id постов, как до 0014."""
+    from django.db import models
+
+    from posts.models import Post
+
+    return [
+        (Post, models.Index(fields=[field], name=f'bench_post_{field}_idx'))
+        for field in ('author', 'group')
+    ]
+
+
+def swap_indexes(remove, add):
+    from django.db import connection
+
+    with connection.schema_editor() as editor:
+        for model, index in remove:
+            editor.remove_index(model, index)
+        for model, index in add:
+            editor.add_index(model, index)
+
+
+def feed_queries():
+    from django.db.models import Q
+
+    from posts.models import Comment, Post
+
+    middle = Post.objects.order_by('pub_date')[Post.objects.count() // 2]
+    sample = Post.objects.exclude(group=None).order_by('-pub_date').first()
+    keyset = Q(pub_date__lte=middle.pub_date) & (
+        Q(pub_date__lt=middle.pub_date) | Q(id__lt=middle.pk))
+    ordering = ('-pub_date', '-id')
+    return {
+        'index': Post.objects.order_by(*ordering)[:11],
+        'index_deep_cursor': Post.objects.filter(keyset)
+        .order_by(*ordering)[:11],
+        'group': Post.objects.filter(group_id=sample.group_id)
+        .order_by(*ordering)[:11],
+        'group_deep_cursor': Post.objects.filter(
+            keyset, group_id=sample.group_id).order_by(*ordering)[:11],
+        'profile': Post.objects.filter(author_id=sample.author_id)
+        .order_by(*ordering)[:11],
+        'comments': Comment.objects.filter(post_id=middle.pk)
+        .order_by('-pub_date')[:20],
+    }
+
+
+def measure(queries, repeat):
+    results = {}
+    for name, queryset in queries.items():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = {
+            'plan': queryset.explain(),
+            'median_ms': round(statistics.median(timings), 3),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--groups', type=int, default=100)
+    parser.add_argument('--comments', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--db', default=DEFAULT_DB_PATH)
+    parser.add_argument('--json', help='куда сохранить результаты')
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    setup_django(args.db)
+    from django.core.management import call_command
+
+    from .seed import seed
+
+    call_command('migrate', verbosity=0)
+    seed(users=args.users, groups=args.groups, posts=args.posts,
+         comments=args.comments)
+    queries = feed_queries()
+    swap_indexes(feed_indexes(), foreign_key_indexes())
+    report = {'before': measure(queries, args.repeat)}
+    swap_indexes(foreign_key_indexes(), feed_indexes())
+    report['after'] = measure(queries, args.repeat)
+
+    for name in queries:
+        before, after = report['before'][name], report['after'][name]
+        print(f'{name}: {before["median_ms"]} ms -> {after["median_ms"]} ms')
+        print(f'  до:    {before["plan"]}')
+        print(f'  после: {after["plan"]}')
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,329 @@
+"""Задержка и число запросов к БД для каждого маршрута posts/urls.py.
+
+Запуск из каталога yatube:
+
+    python -m benchmarks.load --posts 100000 --json report.json
+    python -m benchmarks.load --keep-db --baseline report.json
+
+С --server запросы идут по HTTP в локальный WSGI-сервер, без него —
+через тестовый клиент Django. Если есть отчёт --baseline, команда
+завершается с кодом 1 при регрессии p95 или числа запросов.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+from . import DEFAULT_DB_PATH, setup_django
+
+PERCENTILES = (50, 95, 99)
+
+
+def scenarios():
+    """Запрос (метод, путь, данные, пользователь) для каждого маршрута."""
+    from django.db.models import Count
+    from django.urls import reverse
+
+    from posts.models import Follow, Group, Post, User
+
+    author = User.objects.order_by('-stats__posts_count').first()
+    post = Post.objects.filter(author=author).order_by(
+        '-comments_count').first()
+    group = Group.objects.annotate(total=Count('posts')).order_by(
+        '-total').first()
+    viewer = User.objects.get(pk=Follow.objects.values_list(
+        'user_id', flat=True).first())
+    stranger = User.objects.exclude(pk=author.pk).exclude(
+        following__user=author).first()
+    batch = {'author': list(
+        User.objects.exclude(pk=viewer.pk).values_list(
+            'username', flat=True)[:50]
+    )}
+    return {
+        'index': ('GET', reverse('posts:index'), None, None),
+        'group_list': (
+            'GET', reverse('posts:group_list', args=[group.slug]),
+            None, None),
+        'profile': (
+            'GET', reverse('posts:profile', args=[author.username]),
+            None, None),
+        'search': ('GET', reverse('posts:search'), {'q': 'пост'}, None),
+        'trending': ('GET', reverse('posts:trending'), None, None),
+        'edit': ('GET', reverse('posts:edit', args=[post.pk]), None, author),
+        'post_detail': (
+            'GET', reverse('posts:post_detail', args=[post.pk]),
+            None, None),
+        'post_create': ('GET', reverse('posts:post_create'), None, author),
+        'group_create': ('GET', reverse('posts:group_create'), None, author),
+        'add_comment': (
+            'POST', reverse('posts:add_comment', args=[post.pk]),
+            {'text': 'Комментарий из нагрузочного теста'}, viewer),
+        'post_comments': (
+            'GET', reverse('posts:post_comments', args=[post.pk]),
+            None, None),
+        'follow_index': ('GET', reverse('posts:follow_index'), None, viewer),
+        'profile_follow': (
+            'GET', reverse('posts:profile_follow', args=[stranger.username]),
+            None, author),
+        'profile_unfollow': (
+            'GET',
+            reverse('posts:profile_unfollow', args=[stranger.username]),
+            None, author),
+        'follow_batch': (
+            'POST', reverse('posts:follow_batch'), batch, viewer),
+        'unfollow_batch': (
+            'POST', reverse('posts:unfollow_batch'), batch, viewer),
+        'index_feed': (
+            'GET', reverse('posts:index_feed', args=['rss']), None, None),
+        'group_feed': (
+            'GET', reverse('posts:group_feed', args=[group.slug, 'atom']),
+            None, None),
+        'profile_feed': (
+            'GET',
+            reverse('posts:profile_feed', args=[author.username, 'json']),
+            None, None),
+    }
+
+
+class ClientTransport:
+    """Запросы через django.test.Client в текущем процессе."""
+
+    def __init__(self):
+        from django.test import Client
+
+        self.clients = {}
+        self.client_class = Client
+
+    def _client(self, user):
+        key = user.pk if user else None
+        if key not in self.clients:
+            client = self.client_class()
+            if user:
+                client.force_login(user)
+            self.clients[key] = client
+        return self.clients[key]
+
+    def request(self, method, path, data, user):
+        client = self._client(user)
+        if method == 'POST':
+            return client.post(path, data).status_code
+        return client.get(path, data).status_code
+
+    def close(self):
+        pass
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class ServerTransport(ClientTransport):
+    """Запросы по HTTP в WSGI-сервер, запущенный в отдельном потоке."""
+
+    def __init__(self, application):
+        from django.utils.crypto import get_random_string
+
+        super().__init__()
+        self.csrf_token = get_random_string(64)
+        self.server = make_server(
+            '127.0.0.1', 0, application, handler_class=_QuietHandler)
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}'
+
+    def request(self, method, path, data, user):
+        from django.conf import settings
+
+        url = self.base_url + path
+        body = None
+        if data and method == 'GET':
+            url += '?' + urllib.parse.urlencode(data, doseq=True)
+        elif data:
+            body = urllib.parse.urlencode(data, doseq=True).encode()
+        request = urllib.request.Request(url, data=body, method=method)
+        cookies = {settings.CSRF_COOKIE_NAME: self.csrf_token}
+        if user:
+            session = self._client(user).cookies[settings.SESSION_COOKIE_NAME]
+            cookies[settings.SESSION_COOKIE_NAME] = session.value
+        request.add_header('Cookie', '; '.join(
+            f'{name}={value}' for name, value in cookies.items()))
+        # Одинаковый токен в cookie и заголовке проходит проверку CSRF.
+        request.add_header('X-CSRFToken', self.csrf_token)
+        opener = urllib.request.build_opener(_NoRedirect)
+        try:
+            with opener.open(request) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            return error.code
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class ProfilingApplication:
+    """WSGI-обёртка, которая сохраняет Profile последнего запроса.
+
+    Запросы к БД сервера идут в его потоке, поэтому профиль снимается
+    там же, а не в потоке драйвера.
+    """
+
+    def __init__(self, application):
+        self.application = application
+        self.last_profile = None
+
+    def __call__(self, environ, start_response):
+        from core import profiling
+
+        with profiling.profile() as current:
+            response = list(self.application(environ, start_response))
+        self.last_profile = current
+        return response
+
+
+def measure(transport, application, routes, repeat):
+    from core import profiling
+
+    results = {}
+    for name, (method, path, data, user) in routes.items():
+        transport.request(method, path, data, user)
+        timings, queries = [], []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            if application is None:
+                with profiling.profile() as current:
+                    status = transport.request(method, path, data, user)
+            else:
+                status = transport.request(method, path, data, user)
+                current = application.last_profile
+            timings.append((time.perf_counter() - started) * 1000)
+            queries.append(sum(current.queries.values()))
+        result = {
+            f'p{pct}_ms': round(profiling.percentile(timings, pct), 3)
+            for pct in PERCENTILES
+        }
+        result['queries'] = max(queries)
+        result['status'] = status
+        results[name] = result
+    return results
+
+
+def compare(report, baseline, tolerance):
+    """Список регрессий относительно сохранённого отчёта."""
+    regressions = []
+    for name, result in report['routes'].items():
+        before = baseline['routes'].get(name)
+        if before is None:
+            continue
+        if result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(
+                f'{name}: p95 {before["p95_ms"]} -> {result["p95_ms"]} ms')
+        if result['queries'] > before['queries']:
+            regressions.append(
+                f'{name}: запросов {before["queries"]} -> '
+                f'{result["queries"]}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--groups', type=int, default=50)
+    parser.add_argument('--follows', type=int, default=20)
+    parser.add_argument('--comments', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--db', default=DEFAULT_DB_PATH)
+    parser.add_argument(
+        '--keep-db', action='store_true',
+        help='не пересоздавать базу, если она уже есть')
+    parser.add_argument(
+        '--server', action='store_true',
+        help='ходить в локальный WSGI-сервер вместо тестового клиента')
+    parser.add_argument('--json', help='куда сохранить отчёт')
+    parser.add_argument('--baseline', help='отчёт для сравнения')
+    parser.add_argument(
+        '--tolerance', type=float, default=0.2,
+        help='допустимый рост p95 относительно baseline')
+    args = parser.parse_args()
+
+    reuse = args.keep_db and os.path.exists(args.db)
+    if not reuse and os.path.exists(args.db):
+        os.remove(args.db)
+    setup_django(args.db)
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.core.wsgi import get_wsgi_application
+
+    from .seed import seed
+
+    settings.ALLOWED_HOSTS.append('testserver')
+    # Драйвер сам снимает профиль каждого запроса.
+    settings.MIDDLEWARE.remove('core.middleware.QueryProfilingMiddleware')
+    if not reuse:
+        call_command('migrate', verbosity=0)
+        seed(users=args.users, groups=args.groups, posts=args.posts,
+             follows=args.follows, comments=args.comments)
+
+    from posts.urls import urlpatterns
+
+    routes = scenarios()
+    missing = {pattern.name for pattern in urlpatterns} - set(routes)
+    if missing:
+        parser.error(f'нет сценария для маршрутов: {", ".join(missing)}')
+    application = None
+    transport = ClientTransport()
+    if args.server:
+        application = ProfilingApplication(get_wsgi_application())
+        transport = ServerTransport(application)
+    try:
+        results = measure(transport, application, routes, args.repeat)
+    finally:
+        transport.close()
+
+    report = {
+        'meta': {
+            'transport': 'server' if args.server else 'client',
+            'repeat': args.repeat,
+            'python': sys.version.split()[0],
+        },
+        'routes': results,
+    }
+    write_report(report, args.json)
+    if args.baseline:
+        with open(args.baseline) as source:
+            regressions = compare(report, json.load(source), args.tolerance)
+        for regression in regressions:
+            print(f'РЕГРЕССИЯ {regression}')
+        if regressions:
+            sys.exit(1)
+
+
+def write_report(report, path):
+    for name, result in report['routes'].items():
+        print(
+            f'{name}: p50={result["p50_ms"]} p95={result["p95_ms"]} '
+            f'p99={result["p99_ms"]} ms, запросов {result["queries"]}, '
+            f'статус {result["status"]}'
+        )
+    if path:
+        with open(path, 'w') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
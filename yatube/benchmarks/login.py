@@ -0,0 +1,132 @@
+"""Входов в секунду на одно ядро для каждого хешера PASSWORD_HASHERS.
+
+Запуск из каталога yatube:
+
+    python -m benchmarks.login --logins 50 --json login.json
+
+Хешер ставится первым в PASSWORD_HASHERS, чтобы пароль не
+перешифровывался при входе, и измеряется дважды: verify() — цена
+самого хеша, POST на users:login через тестовый клиент — весь вход с
+сессией и запросами к БД. Процесс однопоточный, поэтому числа — на одно
+ядро. Хешеры без установленной библиотеки (Argon2) пропускаются.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from . import DEFAULT_DB_PATH, setup_django
+
+USERNAME = 'benchmark-login'
+PASSWORD = 'benchmark-password'
+
+
+def available_hashers():
+    """(путь, хешер) для хешеров, чьи библиотеки установлены."""
+    from django.conf import settings
+    from django.utils.module_loading import import_string
+
+    hashers = []
+    for path in settings.PASSWORD_HASHERS:
+        hasher = import_string(path)()
+        try:
+            hasher.encode(PASSWORD, hasher.salt())
+        except ValueError as error:
+            print(f'{path}: пропущен ({error})')
+            continue
+        hashers.append((path, hasher))
+    return hashers
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    median = statistics.median(timings)
+    return {
+        'median_ms': round(median * 1000, 3),
+        'per_second': round(1 / median, 1),
+    }
+
+
+def measure(path, hasher, logins, verifies):
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from django.test.utils import override_settings
+    from django.urls import reverse
+
+    encoded = hasher.encode(PASSWORD, hasher.salt())
+    result = {
+        'verify': timed(lambda: hasher.verify(PASSWORD, encoded), verifies),
+    }
+    others = [name for name in settings.PASSWORD_HASHERS if name != path]
+    with override_settings(PASSWORD_HASHERS=[path, *others]):
+        user, _ = get_user_model().objects.get_or_create(username=USERNAME)
+        user.set_password(PASSWORD)
+        user.save()
+        url = reverse('users:login')
+        data = {'username': USERNAME, 'password': PASSWORD}
+
+        def login():
+            response = Client().post(url, data)
+            assert response.status_code == 302, response.status_code
+
+        login()
+        result['login'] = timed(login, logins)
+        user.refresh_from_db()
+        assert user.password.split('$', 1)[0] == hasher.algorithm
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--logins', type=int, default=50)
+    parser.add_argument('--verifies', type=int, default=50)
+    parser.add_argument('--db', default=DEFAULT_DB_PATH)
+    parser.add_argument(
+        '--keep-db', action='store_true',
+        help='не пересоздавать базу, если она уже есть')
+    parser.add_argument('--json', help='куда сохранить результаты')
+    args = parser.parse_args()
+
+    reuse = args.keep_db and os.path.exists(args.db)
+    if not reuse and os.path.exists(args.db):
+        os.remove(args.db)
+    setup_django(args.db)
+    from django.conf import settings
+    from django.core.management import call_command
+
+    # Профилировщик запросов не должен попадать в замер входа.
+    settings.MIDDLEWARE.remove('core.middleware.QueryProfilingMiddleware')
+    if not reuse:
+        call_command('migrate', verbosity=0)
+
+    report = {
+        'meta': {
+            'python': sys.version.split()[0],
+            'logins': args.logins,
+            'verifies': args.verifies,
+        },
+        'hashers': {},
+    }
+    for path, hasher in available_hashers():
+        result = measure(path, hasher, args.logins, args.verifies)
+        report['hashers'][hasher.algorithm] = result
+        print(
+            f'{hasher.algorithm}: verify {result["verify"]["median_ms"]} ms '
+            f'({result["verify"]["per_second"]}/с), '
+            f'вход {result["login"]["median_ms"]} ms '
+            f'({result["login"]["per_second"]}/с на ядро)'
+        )
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
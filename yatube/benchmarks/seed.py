@@ -0,0 +1,106 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+User = get_user_model()
+
+BATCH_SIZE = 10000
+
+
+@contextmanager
+def explicit_dates(*models):
+    """Отключает auto_now_add, чтобы раскидать pub_date по времени."""
+    fields = [model._meta.get_field('pub_date') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _batches(items, size=BATCH_SIZE):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _authors(rng, user_ids, user_id, count):
+    """count случайных авторов, не считая самого пользователя."""
+    authors = rng.sample(user_ids, count + 1)
+    if user_id in authors:
+        authors.remove(user_id)
+    return authors[:count]
+
+
+def seed(users=1000, groups=50, posts=100000, follows=20, comments=100000,
+         rng_seed=0):
+    """Наполняет базу через bulk_create и возвращает словарь с объёмами.
+
+    follows — число подписок на пользователя, comments — всего
+    комментариев, они распределяются по случайным постам.
+    """
+    from posts import timeline, trending
+    from posts.counters import reconcile
+    from posts.models import Comment, Follow, Group, Post
+
+    rng = random.Random(rng_seed)
+    now = timezone.now()
+    with transaction.atomic(), explicit_dates(Post, Group, Comment):
+        User.objects.bulk_create(
+            [User(username=f'bench_{num}', password='!')
+             for num in range(users)]
+        )
+        user_ids = list(User.objects.values_list('pk', flat=True))
+        Group.objects.bulk_create([
+            Group(title=f'Группа {num}', slug=f'bench-{num}',
+                  description=f'Описание группы {num}', pub_date=now)
+            for num in range(groups)
+        ])
+        group_ids = list(Group.objects.values_list('pk', flat=True))
+        step = timedelta(days=365) / max(posts, 1)
+        for batch in _batches(
+            Post(
+                text=f'Пост номер {num}',
+                author_id=rng.choice(user_ids),
+                group_id=rng.choice(group_ids) if rng.random() < 0.7
+                else None,
+                pub_date=now - step * (posts - num),
+            )
+            for num in range(posts)
+        ):
+            Post.objects.bulk_create(batch)
+        follows = min(follows, len(user_ids) - 1)
+        for batch in _batches(
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id in user_ids
+            for author_id in _authors(rng, user_ids, user_id, follows)
+        ):
+            Follow.objects.bulk_create(batch, ignore_conflicts=True)
+        post_dates = list(Post.objects.values_list('pk', 'pub_date'))
+        for batch in _batches(
+            Comment(
+                post_id=post_id,
+                author_id=rng.choice(user_ids),
+                text=f'Комментарий номер {num}',
+                pub_date=pub_date + timedelta(minutes=rng.randint(1, 600)),
+            )
+            for num, (post_id, pub_date) in enumerate(
+                rng.choice(post_dates) for _ in range(comments))
+        ):
+            Comment.objects.bulk_create(batch)
+        reconcile()
+        timeline.push_posts(0)
+        trending.rebuild(now)
+    return {'users': users, 'groups': groups, 'posts': posts,
+            'follows': follows, 'comments': comments}
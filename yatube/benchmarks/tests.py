@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+
+class BenchmarksSmokeTest(SimpleTestCase):
+    def test_feed_indexes(self):
+        """Бенчмарк индексов лент работает на текущей схеме."""
+        with tempfile.TemporaryDirectory() as directory:
+            result = subprocess.run(
+                [
+                    sys.executable, '-m', 'benchmarks.feed_indexes',
+                    '--db', os.path.join(directory, 'bench.sqlite3'),
+                    '--posts', '200', '--users', '20', '--groups', '3',
+                    '--comments', '200', '--repeat', '1',
+                ],
+                cwd=settings.BASE_DIR, capture_output=True, text=True,
+            )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('post_author_pub_date_idx', result.stdout)
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Кэши, которые видит только один процесс.
+PER_PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+
+@register()
+def check_session_cache(app_configs, **kwargs):
+    """core.sessions требует кэша, общего для всех процессов сервера.
+
+    Иначе выход из аккаунта очищает кэш только одного процесса, а
+    остальные продолжают принимать удалённую сессию.
+    """
+    if settings.SESSION_ENGINE != 'core.sessions':
+        return []
+    backend = settings.CACHES[settings.SESSION_CACHE_ALIAS]['BACKEND']
+    if backend not in PER_PROCESS_CACHES:
+        return []
+    return [Error(
+        f'Кэш сессий {settings.SESSION_CACHE_ALIAS!r} ({backend}) не общий '
+        'для процессов сервера.',
+        hint='Укажите в SESSION_CACHE_ALIAS кэш на memcached, redis или '
+             'FileBasedCache.',
+        id='core.E001',
+    )]
+
+
+@register()
+def check_fetch_connections(app_configs, **kwargs):
+    """Пулу одновременных чтений нужны постоянные соединения.
+
+    Поток пула живёт дольше запроса, и с CONN_MAX_AGE = 0 каждое чтение
+    в нём открывало бы и закрывало своё соединение с базой.
+    """
+    if settings.CONCURRENT_FETCH_WORKERS < 1:
+        return []
+    return [
+        Error(
+            f'CONCURRENT_FETCH_WORKERS = {settings.CONCURRENT_FETCH_WORKERS}'
+            f', а у базы {alias!r} CONN_MAX_AGE = 0.',
+            hint='Задайте CONN_MAX_AGE (секунды или None) или выключите '
+                 'пул: CONCURRENT_FETCH_WORKERS = 0.',
+            id='core.E002',
+        )
+        for alias, database in settings.DATABASES.items()
+        if database.get('CONN_MAX_AGE', 0) == 0
+    ]
@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, connections
+
+from yatube.settings import CONCURRENT_FETCH_WORKERS
+
+from . import db
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=CONCURRENT_FETCH_WORKERS,
+            thread_name_prefix='fetch',
+        )
+    return _executor
+
+
+def _run(func, pinned):
+    # Поток пула наследует закрепление за основной базой. Соединение
+    # живёт до CONN_MAX_AGE (ноль запрещён проверкой core.E002),
+    # закрываются только устаревшие и сломанные.
+    db.pin(pinned)
+    try:
+        return func()
+    finally:
+        db.reset()
+        close_old_connections()
+
+
+def fetch_concurrently(*funcs):
+    """Выполняет независимые чтения одновременно и возвращает их результаты.
+
+    Первая функция идёт в текущем потоке, остальные — в пуле из
+    CONCURRENT_FETCH_WORKERS потоков со своими соединениями. Внутри
+    транзакции другие соединения не видят её изменений, поэтому там, как
+    и при выключенном пуле, функции выполняются по очереди.
+    """
+    if (CONCURRENT_FETCH_WORKERS < 1 or len(funcs) < 2
+            or any(conn.in_atomic_block for conn in connections.all())):
+        return [func() for func in funcs]
+    pinned = db.is_pinned()
+    executor = _get_executor()
+    futures = [executor.submit(_run, func, pinned) for func in funcs[1:]]
+    first = funcs[0]()
+    return [first, *(future.result() for future in futures)]
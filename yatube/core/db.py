@@ -0,0 +1,87 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from yatube.settings import DATABASE_REPLICAS
+
+PRIMARY = 'default'
+# Запросы, после которых закреплять чтение за основной базой не нужно.
+READ_STATEMENTS = (
+    'SELECT', 'EXPLAIN', 'PRAGMA', 'SHOW', 'SET', 'BEGIN', 'SAVEPOINT',
+    'RELEASE', 'ROLLBACK',
+)
+
+_local = threading.local()
+
+
+def is_pinned():
+    return getattr(_local, 'pinned', False)
+
+
+def pin(value=True):
+    _local.pinned = value
+
+
+def wrote():
+    """Была ли запись в текущем запросе."""
+    return getattr(_local, 'wrote', False)
+
+
+def track_writes(execute, sql, params, many, context):
+    """execute_wrapper основной базы: после записи поток читает из неё.
+
+    Записью считается любой запрос, кроме чтений и управления
+    транзакциями. Вызов db_for_write() сам по себе ничего не пишет
+    (например, on_commit спрашивает базу у роутера), поэтому не
+    закрепляет запрос.
+    """
+    if not sql.lstrip().upper().startswith(READ_STATEMENTS):
+        pin()
+        _local.wrote = True
+    return execute(sql, params, many, context)
+
+
+def install_write_tracking(sender, connection, **kwargs):
+    """Обработчик connection_created: подключает track_writes к default."""
+    if (connection.alias == PRIMARY
+            and track_writes not in connection.execute_wrappers):
+        connection.execute_wrappers.append(track_writes)
+
+
+def reset():
+    _local.pinned = False
+    _local.wrote = False
+
+
+@contextmanager
+def use_primary():
+    """Все чтения внутри блока идут в основную базу."""
+    pinned = is_pinned()
+    pin()
+    try:
+        yield
+    finally:
+        pin(pinned)
+
+
+class PrimaryReplicaRouter:
+    """Чтение из случайной реплики, запись и закреплённые чтения — в default.
+
+    После первой записи (её замечает track_writes) запрос закрепляется
+    за основной базой, чтобы дальше читать только что записанные данные.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not DATABASE_REPLICAS or is_pinned():
+            return PRIMARY
+        return random.choice(DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Схема реплик приходит с репликацией.
+        return db == PRIMARY
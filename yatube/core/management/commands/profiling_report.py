@@ -0,0 +1,47 @@
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand
+
+from core import profiling
+
+PERCENTILES = (50, 95, 99)
+METRICS = (
+    ('queries', 'запросов', 1),
+    ('db_time', 'БД, мс', 1000),
+    ('template_time', 'шаблоны, мс', 1000),
+    ('total_time', 'всего, мс', 1000),
+)
+
+
+class Command(BaseCommand):
+    help = 'Выводит перцентили замеров QueryProfilingMiddleware по view.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Очистить буфер после вывода отчёта.',
+        )
+
+    def handle(self, *args, **options):
+        by_view = defaultdict(list)
+        for sample in profiling.samples():
+            by_view[sample['view']].append(sample)
+        if not by_view:
+            self.stdout.write('Замеров нет.')
+        for view, samples in sorted(by_view.items()):
+            self.stdout.write(f'{view} (замеров: {len(samples)})')
+            for field, title, scale in METRICS:
+                values = [sample[field] * scale for sample in samples]
+                stats = ' '.join(
+                    f'p{pct}={profiling.percentile(values, pct):.1f}'
+                    for pct in PERCENTILES
+                )
+                self.stdout.write(f'  {title}: {stats}')
+            duplicates = Counter()
+            for sample in samples:
+                duplicates.update(sample['duplicates'].keys())
+            for sql, seen in duplicates.most_common():
+                self.stdout.write(
+                    f'  повторяющийся запрос в {seen} замерах: {sql}')
+        if options['clear']:
+            profiling.clear()
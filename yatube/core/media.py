@@ -0,0 +1,173 @@
+"""Раздача MEDIA_ROOT без прокачки байтов через Python.
+
+Вид проверяет путь и условные заголовки, а сам файл отдаёт бэкенд из
+MEDIA_SERVE_BACKEND:
+
+* XAccelRedirectBackend — пустой ответ с X-Accel-Redirect, файл читает
+  nginx из internal-локации MEDIA_ACCEL_PREFIX;
+* XSendfileBackend — заголовок X-Sendfile для Apache (mod_xsendfile)
+  и lighttpd;
+* FileResponseBackend — FileResponse с поддержкой Range. Сервер с
+  wsgi.file_wrapper (gunicorn, uWSGI) отправляет его через sendfile.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.utils.module_loading import import_string
+from django.views.decorators.http import require_safe
+
+from yatube.settings import (MEDIA_ACCEL_PREFIX, MEDIA_MAX_AGE,
+                             MEDIA_SERVE_BACKEND)
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """Диапазон (start, end) включительно из заголовка Range или None.
+
+    Поддерживается один диапазон; несколько диапазонов и чужие единицы
+    дают None, то есть ответ целиком, как разрешает RFC 7233.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        if int(last) == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    end = min(int(last), size - 1) if last else size - 1
+    return start, end
+
+
+class FileRange:
+    """Файл, из которого читается только length байт с позиции start.
+
+    fileno() отдаёт дескриптор, уже сдвинутый на start: wsgi.file_wrapper
+    отправит диапазон через sendfile, длину он берёт из Content-Length.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+class FileResponseBackend:
+    def response(self, request, path, fullpath, stat_result, etag):
+        size = stat_result.st_size
+        byte_range = None
+        if self._range_applies(request, stat_result, etag):
+            try:
+                byte_range = parse_range(request.META['HTTP_RANGE'], size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+        file = open(fullpath, 'rb')
+        if byte_range is None:
+            response = FileResponse(file)
+        else:
+            start, end = byte_range
+            length = end - start + 1
+            response = FileResponse(
+                FileRange(file, start, length), status=206)
+            response['Content-Length'] = length
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    def _range_applies(self, request, stat_result, etag):
+        """Есть ли Range и совпадает ли If-Range с текущим файлом."""
+        if 'HTTP_RANGE' not in request.META:
+            return False
+        if_range = request.META.get('HTTP_IF_RANGE')
+        return if_range is None or if_range in (
+            etag, http_date(stat_result.st_mtime))
+
+
+class XSendfileBackend:
+    header = 'X-Sendfile'
+
+    def location(self, path, fullpath):
+        return fullpath
+
+    def response(self, request, path, fullpath, stat_result, etag):
+        # Range и условные запросы к самому файлу обрабатывает прокси.
+        response = HttpResponse()
+        response[self.header] = self.location(path, fullpath)
+        return response
+
+
+class XAccelRedirectBackend(XSendfileBackend):
+    header = 'X-Accel-Redirect'
+
+    def location(self, path, fullpath):
+        return MEDIA_ACCEL_PREFIX + path
+
+
+def get_backend():
+    return import_string(MEDIA_SERVE_BACKEND)()
+
+
+@require_safe
+def serve(request, path):
+    """Отдаёт файл из MEDIA_ROOT через бэкенд MEDIA_SERVE_BACKEND.
+
+    Имена загрузок не переиспользуются (хранилище не перезаписывает
+    файлы), поэтому ответ кэшируется на MEDIA_MAX_AGE.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+        stat_result = os.stat(fullpath)
+    except (OSError, ValueError):
+        raise Http404('Файл не найден')
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404('Файл не найден')
+    etag = f'"{int(stat_result.st_mtime):x}-{stat_result.st_size:x}"'
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat_result.st_mtime))
+    if response is None:
+        response = get_backend().response(
+            request, path, fullpath, stat_result, etag)
+        content_type, encoding = mimetypes.guess_type(path)
+        response['Content-Type'] = content_type or 'application/octet-stream'
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat_result.st_mtime)
+    patch_cache_control(response, public=True, max_age=MEDIA_MAX_AGE)
+    return response
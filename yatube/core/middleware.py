@@ -0,0 +1,65 @@
+import logging
+import random
+from time import perf_counter
+
+from yatube.settings import (PRIMARY_PIN_COOKIE, PRIMARY_PIN_SECONDS,
+                             PROFILING_SAMPLE_RATE)
+
+from . import db, profiling
+
+logger = logging.getLogger(__name__)
+
+
+class QueryProfilingMiddleware:
+    """Профилирует часть запросов и пишет замеры в кольцевой буфер.
+
+    Доля запросов задаётся PROFILING_SAMPLE_RATE, отчёт по замерам
+    выводит команда profiling_report.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+        start = perf_counter()
+        with profiling.profile() as current:
+            response = self.get_response(request)
+        total_time = perf_counter() - start
+        match = request.resolver_match
+        view = match.view_name if match else request.path
+        sample = current.as_sample(view, total_time)
+        for sql, count in sample['duplicates'].items():
+            logger.warning(
+                'Повторяющийся запрос в %s (%d раз): %s', view, count, sql)
+        profiling.record(sample)
+        return response
+
+
+class PrimaryPinMiddleware:
+    """Читать из основной базы какое-то время после записи (read-your-writes).
+
+    Запрос с небезопасным методом или с cookie PRIMARY_PIN_COOKIE
+    целиком читает из default. Если запрос что-то записал, cookie
+    ставится на PRIMARY_PIN_SECONDS, пока реплики догоняют основную базу.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        db.reset()
+        if (request.method not in ('GET', 'HEAD', 'OPTIONS')
+                or PRIMARY_PIN_COOKIE in request.COOKIES):
+            db.pin()
+        try:
+            response = self.get_response(request)
+            if db.wrote():
+                response.set_cookie(
+                    PRIMARY_PIN_COOKIE, '1', max_age=PRIMARY_PIN_SECONDS,
+                    httponly=True, samesite='Lax',
+                )
+        finally:
+            db.reset()
+        return response
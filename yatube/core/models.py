@@ -6,6 +6,11 @@ class CreatedModel(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+        db_index=True,
+    )
 
     class Meta:
         abstract = True
@@ -0,0 +1,136 @@
+import math
+import threading
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from time import perf_counter
+
+from django.core.cache import caches
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+from yatube.settings import (PROFILING_BUFFER_SIZE,
+                             PROFILING_DUPLICATE_THRESHOLD)
+
+BUFFER_CURSOR_KEY = 'profiling:cursor'
+
+_local = threading.local()
+
+
+def _buffer():
+    return caches['profiling']
+
+
+def _slot_key(slot):
+    return f'profiling:slot:{slot}'
+
+
+class Profile:
+    """Запросы к БД и время рендера шаблонов одного HTTP-запроса."""
+
+    def __init__(self):
+        self.queries = Counter()
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper получает SQL с плейсхолдерами, так что строка
+        # запроса уже и есть его шаблон без конкретных значений.
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += perf_counter() - start
+            self.queries[sql] += 1
+
+    @property
+    def duplicates(self):
+        return {
+            sql: count for sql, count in self.queries.items()
+            if count >= PROFILING_DUPLICATE_THRESHOLD
+        }
+
+    def as_sample(self, view, total_time):
+        return {
+            'view': view,
+            'queries': sum(self.queries.values()),
+            'db_time': self.db_time,
+            'template_time': self.template_time,
+            'total_time': total_time,
+            'duplicates': self.duplicates,
+        }
+
+
+@contextmanager
+def profile():
+    """Собирает Profile для кода внутри блока во всех подключениях к БД."""
+    current = Profile()
+    _local.profile = current
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(current))
+            yield current
+    finally:
+        _local.profile = None
+
+
+class ProfiledTemplate(Template):
+    def render(self, context=None, request=None):
+        current = getattr(_local, 'profile', None)
+        if current is None:
+            return super().render(context, request)
+        # Вложенный render_to_string уже учтён во времени внешнего шаблона.
+        current.template_depth += 1
+        start = perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            current.template_depth -= 1
+            if not current.template_depth:
+                current.template_time += perf_counter() - start
+
+
+class ProfilingTemplates(DjangoTemplates):
+    """Шаблонный бэкенд Django, который замеряет время рендера."""
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(
+            super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return ProfiledTemplate(
+            super().get_template(template_name).template, self)
+
+
+def record(sample):
+    """Кладёт замер в кольцевой буфер из PROFILING_BUFFER_SIZE ячеек."""
+    buffer = _buffer()
+    buffer.add(BUFFER_CURSOR_KEY, 0, None)
+    try:
+        position = buffer.incr(BUFFER_CURSOR_KEY)
+    except ValueError:
+        # Счётчик вытеснили из кэша между add и incr.
+        return
+    buffer.set(_slot_key(position % PROFILING_BUFFER_SIZE), sample, None)
+
+
+def samples():
+    keys = [_slot_key(slot) for slot in range(PROFILING_BUFFER_SIZE)]
+    return list(_buffer().get_many(keys).values())
+
+
+def clear():
+    _buffer().delete_many(
+        [BUFFER_CURSOR_KEY]
+        + [_slot_key(slot) for slot in range(PROFILING_BUFFER_SIZE)]
+    )
+
+
+def percentile(values, pct):
+    """Перцентиль методом ближайшего ранга."""
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(values)), 1)
+    return values[rank - 1]
@@ -0,0 +1,95 @@
+"""Сессии из кэша, которые пишутся в БД только при изменении данных."""
+import hashlib
+import time
+
+from django.contrib.sessions.backends.cached_db import \
+    SessionStore as CachedDBStore
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.utils import timezone
+
+from yatube.settings import SESSION_CLEANUP_BATCH_SIZE, SESSION_DB_REFRESH_AGE
+
+from .db import use_primary
+
+
+class SessionStore(CachedDBStore):
+    """cached_db, который не переписывает в БД неизменившуюся сессию.
+
+    В кэше рядом с данными лежат отпечаток записанных в БД данных и срок
+    строки в БД. save() обновляет строку, только если данные отличаются
+    от записанных или строке осталось жить меньше SESSION_DB_REFRESH_AGE,
+    иначе ничего не пишет. Кэш живёт не дольше строки, поэтому очистка
+    БД не оставляет в нём сессий, которых уже нет.
+
+    При промахе кэша сессия читается из основной базы: реплика может
+    ещё не знать о только что выполненном входе.
+    """
+    cache_key_prefix = 'core.sessions'
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        # (отпечаток данных, срок) строки в БД или None, если неизвестно.
+        self._stored = None
+
+    def _digest(self, data):
+        return hashlib.md5(self.serializer().dumps(data)).hexdigest()
+
+    def _cache_entry(self, data):
+        _, expiry = self._stored
+        timeout = max(int(expiry - time.time()), 1)
+        self._cache.set(self.cache_key, (data, self._stored), timeout)
+
+    def load(self):
+        try:
+            entry = self._cache.get(self.cache_key)
+        except Exception:
+            # Как в cached_db: неверный для memcached ключ сбрасывает сессию.
+            entry = None
+        if entry is not None:
+            data, self._stored = entry
+            return data
+        with use_primary():
+            session = self._get_session_from_db()
+        if session is None:
+            return {}
+        data = self.decode(session.session_data)
+        self._stored = (self._digest(data), session.expire_date.timestamp())
+        self._cache_entry(data)
+        return data
+
+    def _needs_write(self, data):
+        if self._stored is None:
+            return True
+        digest, expiry = self._stored
+        return (digest != self._digest(data)
+                or expiry - time.time() < SESSION_DB_REFRESH_AGE)
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        if not must_create and not self._needs_write(data):
+            # Кэш уже содержит эти данные; перезапись могла бы затереть
+            # более новую версию из параллельного запроса.
+            return
+        DBStore.save(self, must_create)
+        self._stored = (self._digest(data), self.get_expiry_date().timestamp())
+        self._cache_entry(data)
+
+    @classmethod
+    def clear_expired(cls):
+        """Удаляет истёкшие сессии пачками по SESSION_CLEANUP_BATCH_SIZE.
+
+        Короткие DELETE не держат блокировки на таблице сессий, пока
+        clearsessions разбирает накопившееся. Кэш истёкших сессий
+        очищается сам по таймауту.
+        """
+        model = cls.get_model_class()
+        expired = model.objects.filter(expire_date__lt=timezone.now())
+        while True:
+            with use_primary():
+                keys = list(expired.values_list('pk', flat=True)[
+                    :SESSION_CLEANUP_BATCH_SIZE])
+            if not keys:
+                return
+            model.objects.filter(pk__in=keys).delete()
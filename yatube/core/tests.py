@@ -1,4 +1,44 @@
-from django.test import TestCase
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connections, router
+from django.http import HttpResponse
+from django.test import (Client, RequestFactory, SimpleTestCase, TestCase,
+                         TransactionTestCase)
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Post, User
+from yatube.settings import PRIMARY_PIN_COOKIE
+
+from . import checks, concurrency, db, media, profiling
+from .sessions import SessionStore
+from .middleware import PrimaryPinMiddleware
+from .uploads import LimitedUploadHandler
+
+PROFILING_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'profiling': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'profiling-tests',
+    },
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions-tests',
+    },
+}
 
 
 class ViewTestClass(TestCase):
@@ -7,3 +47,448 @@ class ViewTestClass(TestCase):
         response = self.client.get('/unexisting_page/')
         self.assertEqual(response.status_code, 404)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+@override_settings(CACHES=PROFILING_CACHES)
+class ProfilingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='test-username')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        profiling.clear()
+
+    def test_middleware_records_samples(self):
+        """Middleware пишет замер с именем view, запросами и шаблонами."""
+        with mock.patch('core.middleware.PROFILING_SAMPLE_RATE', 1):
+            self.client.get(f'/posts/{self.post.pk}/')
+        [sample] = profiling.samples()
+        self.assertEqual(sample['view'], 'posts:post_detail')
+        self.assertGreater(sample['queries'], 0)
+        self.assertGreater(sample['template_time'], 0)
+        self.assertGreaterEqual(sample['total_time'], sample['db_time'])
+        with mock.patch('core.middleware.PROFILING_SAMPLE_RATE', 0):
+            self.client.get(f'/posts/{self.post.pk}/')
+        self.assertEqual(len(profiling.samples()), 1)
+
+    def test_duplicate_queries_detected(self):
+        """Одинаковые запросы с разными параметрами считаются повтором."""
+        with profiling.profile() as current:
+            for pk in range(profiling.PROFILING_DUPLICATE_THRESHOLD):
+                User.objects.filter(pk=pk).first()
+            Post.objects.count()
+        self.assertEqual(list(current.duplicates.values()), [
+            profiling.PROFILING_DUPLICATE_THRESHOLD
+        ])
+
+    def test_ring_buffer_overwrites_oldest(self):
+        """Буфер хранит не больше PROFILING_BUFFER_SIZE замеров."""
+        with mock.patch('core.profiling.PROFILING_BUFFER_SIZE', 2):
+            for number in range(3):
+                profiling.record({'view': number})
+            views = sorted(sample['view'] for sample in profiling.samples())
+        self.assertEqual(views, [1, 2])
+
+    def test_profiling_report(self):
+        """Команда выводит перцентили и повторяющиеся запросы по view."""
+        for queries in (1, 2, 3, 10):
+            profiling.record({
+                'view': 'posts:index',
+                'queries': queries,
+                'db_time': 0.001,
+                'template_time': 0.002,
+                'total_time': 0.005,
+                'duplicates': {'SELECT 1': 3} if queries == 10 else {},
+            })
+        out = StringIO()
+        call_command('profiling_report', '--clear', stdout=out)
+        output = out.getvalue()
+        self.assertIn('posts:index (замеров: 4)', output)
+        self.assertIn('запросов: p50=2.0 p95=10.0 p99=10.0', output)
+        self.assertIn('повторяющийся запрос в 1 замерах: SELECT 1', output)
+        self.assertEqual(profiling.samples(), [])
+
+
+@mock.patch('core.db.DATABASE_REPLICAS', ['replica'])
+class PrimaryReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.reads = []
+
+    def view(self, request):
+        self.reads.append(router.db_for_read(Post))
+        if request.GET.get('write'):
+            db.track_writes(
+                lambda *args: None, 'UPDATE "posts_post" SET "text" = %s',
+                ['Текст'], False, {})
+            self.reads.append(router.db_for_read(Post))
+        elif request.GET.get('route'):
+            router.db_for_write(Post)
+            self.reads.append(router.db_for_read(Post))
+        return HttpResponse()
+
+    def call(self, request):
+        self.reads = []
+        return PrimaryPinMiddleware(self.view)(request)
+
+    def test_reads_go_to_replica(self):
+        """Чтение без записей идёт в реплику, cookie не ставится."""
+        response = self.call(self.factory.get('/'))
+        self.assertEqual(self.reads, ['replica'])
+        self.assertNotIn(PRIMARY_PIN_COOKIE, response.cookies)
+
+    def test_read_your_writes(self):
+        """После записи чтения идут в default, пока жива cookie."""
+        response = self.call(self.factory.get('/', {'write': 1}))
+        self.assertEqual(self.reads, ['replica', 'default'])
+        self.assertIn(PRIMARY_PIN_COOKIE, response.cookies)
+        request = self.factory.get('/')
+        request.COOKIES[PRIMARY_PIN_COOKIE] = '1'
+        self.call(request)
+        self.assertEqual(self.reads, ['default'])
+        self.call(self.factory.get('/'))
+        self.assertEqual(self.reads, ['replica'])
+
+    def test_write_routing_alone_not_pinned(self):
+        """Выбор базы для записи без самой записи не закрепляет запрос."""
+        response = self.call(self.factory.get('/', {'route': 1}))
+        self.assertEqual(self.reads, ['replica', 'replica'])
+        self.assertNotIn(PRIMARY_PIN_COOKIE, response.cookies)
+
+    def test_unsafe_methods_use_primary(self):
+        """POST целиком читает из основной базы."""
+        self.call(self.factory.post('/'))
+        self.assertEqual(self.reads, ['default'])
+
+    def test_use_primary(self):
+        """use_primary закрепляет чтение только внутри блока."""
+        with db.use_primary():
+            self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertEqual(router.db_for_read(Post), 'replica')
+
+
+class ReplicaTest(TransactionTestCase):
+    """Чтение и закрепление на настоящей второй базе SQLite."""
+
+    def setUp(self):
+        caches['default'].clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.replica_path = os.path.join(directory, 'replica.sqlite3')
+        databases = mock.patch.dict(connections.databases, {'replica': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': self.replica_path,
+        }})
+        databases.start()
+        self.addCleanup(databases.stop)
+        self.addCleanup(connections.__delitem__, 'replica')
+        self.addCleanup(lambda: connections['replica'].close())
+        replicas = mock.patch('core.db.DATABASE_REPLICAS', ['replica'])
+        replicas.start()
+        self.addCleanup(replicas.stop)
+        self.addCleanup(db.reset)
+
+    def replicate(self):
+        """Копирует основную базу в реплику, как это сделала бы репликация."""
+        primary = connections['default']
+        primary.ensure_connection()
+        replica = sqlite3.connect(self.replica_path)
+        try:
+            primary.connection.backup(replica)
+        finally:
+            replica.close()
+
+    def texts(self, client):
+        response = client.get(reverse('api:post_list'))
+        return [post['text'] for post in response.json()['results']]
+
+    def test_reads_and_pinning(self):
+        """Чтения идут в реплику, после записи — в основную базу."""
+        reader = User.objects.create_user(username='reader')
+        author = User.objects.create_user(username='author')
+        post = Post.objects.create(author=author, text='Есть в реплике')
+        self.replicate()
+        Post.objects.create(author=author, text='Только в основной')
+        client = Client()
+        client.force_login(reader)
+        self.assertEqual(self.texts(client), ['Есть в реплике'])
+        for url in (reverse('posts:profile', args=[author.username]),
+                    reverse('posts:follow_index')):
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn(PRIMARY_PIN_COOKIE, response.cookies)
+        response = client.post(
+            reverse('posts:add_comment', args=[post.pk]),
+            {'text': 'Комментарий'},
+        )
+        self.assertIn(PRIMARY_PIN_COOKIE, response.cookies)
+        self.assertEqual(
+            self.texts(client), ['Только в основной', 'Есть в реплике'])
+        client.cookies.pop(PRIMARY_PIN_COOKIE)
+        self.assertEqual(self.texts(client), ['Есть в реплике'])
+
+
+@mock.patch('core.concurrency.CONCURRENT_FETCH_WORKERS', 2)
+class FetchConcurrentlyTest(SimpleTestCase):
+    def tearDown(self):
+        db.reset()
+
+    def test_results_in_order(self):
+        """Результаты идут в порядке функций, остальные — в пуле."""
+        names = concurrency.fetch_concurrently(
+            lambda: threading.current_thread().name,
+            lambda: threading.current_thread().name,
+        )
+        self.assertEqual(names[0], threading.current_thread().name)
+        self.assertTrue(names[1].startswith('fetch'))
+
+    def test_pin_passed_to_workers(self):
+        """Поток пула читает из основной базы, если закреплён запрос."""
+        db.pin()
+        pinned = concurrency.fetch_concurrently(db.is_pinned, db.is_pinned)
+        self.assertEqual(pinned, [True, True])
+
+    def test_errors_raised(self):
+        """Исключение из потока пула доходит до вызывающего."""
+        def fail():
+            raise ValueError('ошибка')
+
+        with self.assertRaises(ValueError):
+            concurrency.fetch_concurrently(lambda: None, fail)
+
+    def test_sequential_without_workers(self):
+        """Без пула все функции выполняются в текущем потоке."""
+        current = threading.current_thread().name
+        with mock.patch('core.concurrency.CONCURRENT_FETCH_WORKERS', 0):
+            names = concurrency.fetch_concurrently(
+                lambda: threading.current_thread().name,
+                lambda: threading.current_thread().name,
+            )
+        self.assertEqual(names, [current, current])
+
+
+class LimitedUploadHandlerTest(SimpleTestCase):
+    def upload(self, chunks):
+        handler = LimitedUploadHandler()
+        handler.new_file('image', 'image.gif', 'image/gif', None)
+        start = 0
+        for chunk in chunks:
+            handler.receive_data_chunk(chunk, start)
+            start += len(chunk)
+        file = handler.file_complete(start)
+        self.addCleanup(file.close)
+        return file
+
+    def test_small_file_written(self):
+        """Файл в пределах лимита пишется во временный файл целиком."""
+        with mock.patch('core.uploads.UPLOAD_MAX_SIZE', 10):
+            file = self.upload([b'abcde', b'fghij'])
+        self.assertFalse(file.too_large)
+        self.assertTrue(file.temporary_file_path())
+        self.assertEqual(file.read(), b'abcdefghij')
+
+    def test_large_file_discarded(self):
+        """Превышение лимита помечает файл и освобождает место."""
+        with mock.patch('core.uploads.UPLOAD_MAX_SIZE', 10):
+            file = self.upload([b'abcde', b'fghij', b'k', b'lmnop'])
+        self.assertTrue(file.too_large)
+        self.assertEqual(file.read(), b'')
+
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class MediaServeTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(MEDIA_ROOT, 'posts'))
+        with open(os.path.join(MEDIA_ROOT, 'posts', 'a.gif'), 'wb') as file:
+            file.write(b'0123456789')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def get(self, path='/media/posts/a.gif', **headers):
+        return self.client.get(path, **headers)
+
+    def test_file_served(self):
+        """Файл отдаётся целиком с типом, ETag и долгим кэшем."""
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Content-Type'], 'image/gif')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('max-age=', response['Cache-Control'])
+
+    def test_range(self):
+        """Range отдаёт только запрошенные байты."""
+        cases = (
+            ('bytes=2-4', 'bytes 2-4/10', b'234'),
+            ('bytes=7-', 'bytes 7-9/10', b'789'),
+            ('bytes=-2', 'bytes 8-9/10', b'89'),
+            ('bytes=8-100', 'bytes 8-9/10', b'89'),
+        )
+        for header, content_range, content in cases:
+            with self.subTest(header=header):
+                response = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'], content_range)
+                self.assertEqual(
+                    response['Content-Length'], str(len(content)))
+                self.assertEqual(
+                    b''.join(response.streaming_content), content)
+
+    def test_range_not_satisfiable(self):
+        """Диапазон за концом файла — ответ 416."""
+        response = self.get(HTTP_RANGE='bytes=10-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_stale_if_range_ignored(self):
+        """При устаревшем If-Range файл отдаётся целиком."""
+        etag = self.get()['ETag']
+        response = self.get(HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        response = self.get(HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_get(self):
+        """Повторный запрос с ETag или датой получает 304."""
+        response = self.get()
+        for headers in (
+            {'HTTP_IF_NONE_MATCH': response['ETag']},
+            {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']},
+        ):
+            with self.subTest(headers=headers):
+                self.assertEqual(self.get(**headers).status_code, 304)
+
+    def test_proxy_backends(self):
+        """Прокси-бэкенды отдают только заголовок, без тела."""
+        cases = (
+            ('core.media.XAccelRedirectBackend', 'X-Accel-Redirect',
+             '/internal-media/posts/a.gif'),
+            ('core.media.XSendfileBackend', 'X-Sendfile',
+             os.path.join(MEDIA_ROOT, 'posts', 'a.gif')),
+        )
+        for backend, header, location in cases:
+            with self.subTest(backend=backend), \
+                    mock.patch.object(media, 'MEDIA_SERVE_BACKEND', backend):
+                response = self.get()
+                self.assertEqual(response[header], location)
+                self.assertEqual(response.content, b'')
+                self.assertEqual(response['Content-Type'], 'image/gif')
+
+    def test_missing_files(self):
+        """Каталоги, несуществующие файлы и выход из MEDIA_ROOT — 404."""
+        for path in ('/media/posts/', '/media/posts/b.gif',
+                     '/media/../settings.py'):
+            with self.subTest(path=path):
+                self.assertIn(self.get(path).status_code, (400, 404))
+
+
+class SessionStoreTest(TestCase):
+    def setUp(self):
+        caches['sessions'].clear()
+        self.session = SessionStore()
+        self.session['cart'] = [1, 2]
+        self.session.create()
+
+    def reload(self):
+        return SessionStore(self.session.session_key)
+
+    def stored(self):
+        return Session.objects.get(
+            pk=self.session.session_key).get_decoded()
+
+    def test_read_from_cache(self):
+        """Сохранённая сессия читается без запросов к БД."""
+        with self.assertNumQueries(0):
+            self.assertEqual(self.reload()['cart'], [1, 2])
+
+    def test_unchanged_session_not_written(self):
+        """Сохранение тех же данных не трогает БД."""
+        session = self.reload()
+        session['cart'] = [1, 2]
+        with self.assertNumQueries(0):
+            session.save()
+
+    def test_changed_session_written(self):
+        """Изменения попадают и в кэш, и в БД."""
+        session = self.reload()
+        session['cart'] = [3]
+        session.save()
+        self.assertEqual(self.stored(), {'cart': [3]})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.reload()['cart'], [3])
+
+    def test_expiring_row_refreshed(self):
+        """Строку, которой мало осталось жить, продлевает и пустая правка."""
+        expire_date = Session.objects.get(
+            pk=self.session.session_key).expire_date
+        session = self.reload()
+        session['cart'] = [1, 2]
+        with mock.patch('core.sessions.SESSION_DB_REFRESH_AGE', 10 ** 9):
+            session.save()
+        self.assertGreater(
+            Session.objects.get(pk=session.session_key).expire_date,
+            expire_date,
+        )
+
+    def test_cache_miss_reads_db(self):
+        """Без кэша сессия читается из БД и снова кладётся в кэш."""
+        caches['sessions'].clear()
+        self.assertEqual(self.reload()['cart'], [1, 2])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.reload()['cart'], [1, 2])
+
+    def test_clear_expired_in_batches(self):
+        """Истёкшие сессии удаляются пачками, живые остаются."""
+        Session.objects.bulk_create(
+            Session(
+                session_key=f'expired{number}', session_data='',
+                expire_date=timezone.now() - timezone.timedelta(days=1),
+            )
+            for number in range(5)
+        )
+        with mock.patch('core.sessions.SESSION_CLEANUP_BATCH_SIZE', 2):
+            SessionStore.clear_expired()
+        self.assertEqual(
+            list(Session.objects.values_list('pk', flat=True)),
+            [self.session.session_key],
+        )
+
+
+class SystemChecksTest(SimpleTestCase):
+    def test_per_process_cache_rejected(self):
+        """core.sessions не запускается с кэшем одного процесса."""
+        self.assertEqual(checks.check_session_cache(None), [])
+        with override_settings(SESSION_CACHE_ALIAS='default'):
+            errors = checks.check_session_cache(None)
+        self.assertEqual([error.id for error in errors], ['core.E001'])
+
+    def test_fetch_workers_need_persistent_connections(self):
+        """Пул чтений не запускается с CONN_MAX_AGE = 0."""
+        databases = {
+            alias: {**database, 'CONN_MAX_AGE': 0}
+            for alias, database in settings.DATABASES.items()
+        }
+        with override_settings(CONCURRENT_FETCH_WORKERS=0,
+                               DATABASES=databases):
+            self.assertEqual(checks.check_fetch_connections(None), [])
+        with override_settings(CONCURRENT_FETCH_WORKERS=8,
+                               DATABASES=databases):
+            errors = checks.check_fetch_connections(None)
+        self.assertEqual([error.id for error in errors], ['core.E002'])
+        persistent = {
+            alias: {**database, 'CONN_MAX_AGE': 60}
+            for alias, database in settings.DATABASES.items()
+        }
+        with override_settings(CONCURRENT_FETCH_WORKERS=8,
+                               DATABASES=persistent):
+            self.assertEqual(checks.check_fetch_connections(None), [])
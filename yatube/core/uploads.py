@@ -0,0 +1,32 @@
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+from yatube.settings import UPLOAD_MAX_SIZE
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """Пишет каждый файл во временный файл, но не больше UPLOAD_MAX_SIZE.
+
+    Файл не держится в памяти целиком ни при каком размере: данные идут
+    на диск кусками по chunk_size. Остаток слишком большого файла
+    читается из запроса и отбрасывается, у файла выставляется too_large —
+    ошибку показывает форма, а не обрыв соединения.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.too_large = bool(
+            self.content_length and self.content_length > UPLOAD_MAX_SIZE)
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.too_large and start + len(raw_data) > UPLOAD_MAX_SIZE:
+            self.too_large = True
+            self.file.seek(0)
+            self.file.truncate()
+        if self.too_large:
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.too_large = self.too_large
+        return file
@@ -0,0 +1,153 @@
+from functools import wraps
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.db import transaction
+from django.utils.cache import get_cache_key, learn_cache_key
+
+from core.checks import PER_PROCESS_CACHES
+from core.db import PRIMARY, use_primary
+
+from yatube.settings import (LOCAL_CACHE_TIMEOUT, PAGE_CACHE_LOCK_TIMEOUT,
+                             PAGE_CACHE_TIMEOUT)
+
+INDEX_PAGE_PREFIX = 'index_page'
+POST_CARD_PREFIX = 'post_card'
+FEED_PREFIX = 'feed'
+
+
+def _version_key(key_prefix):
+    return f'{key_prefix}.version'
+
+
+def get_version(key_prefix):
+    """Текущая версия данных, от которых зависят закэшированные страницы."""
+    version = cache.get(_version_key(key_prefix))
+    if version is None:
+        cache.add(_version_key(key_prefix), uuid4().hex, None)
+        version = cache.get(_version_key(key_prefix))
+    return version
+
+
+def get_versions(key_prefixes):
+    """get_version для нескольких префиксов одним обращением к кэшу."""
+    versions = cache.get_many(
+        [_version_key(prefix) for prefix in key_prefixes])
+    return [
+        versions.get(_version_key(prefix)) or get_version(prefix)
+        for prefix in key_prefixes
+    ]
+
+
+def post_card_prefixes(post):
+    """Префиксы версий, от которых зависит карточка поста."""
+    prefixes = [
+        f'{POST_CARD_PREFIX}.post.{post.pk}',
+        f'{POST_CARD_PREFIX}.user.{post.author_id}',
+    ]
+    if post.group_id:
+        prefixes.append(f'{POST_CARD_PREFIX}.group.{post.group_id}')
+    return prefixes
+
+
+def feed_prefix(group_id=None, author_id=None):
+    """Префикс версии ленты сайта, группы или автора."""
+    if group_id is not None:
+        return f'{FEED_PREFIX}.group.{group_id}'
+    if author_id is not None:
+        return f'{FEED_PREFIX}.profile.{author_id}'
+    return FEED_PREFIX
+
+
+def feed_prefixes(post):
+    """Префиксы версий лент, в которые попадает пост.
+
+    Строятся по id, без обращения к автору и группе поста.
+    """
+    prefixes = [feed_prefix(), feed_prefix(author_id=post.author_id)]
+    if post.group_id:
+        prefixes.append(feed_prefix(group_id=post.group_id))
+    return prefixes
+
+
+def versioned_timeout(timeout):
+    """Таймаут для данных, которые устаревают со сменой версии.
+
+    С кэшем на процесс (LocMemCache) invalidate() не доходит до других
+    процессов, и таймаут ограничивается LOCAL_CACHE_TIMEOUT.
+    """
+    backend = settings.CACHES[DEFAULT_CACHE_ALIAS]['BACKEND']
+    if backend in PER_PROCESS_CACHES and (
+            timeout is None or timeout > LOCAL_CACHE_TIMEOUT):
+        return LOCAL_CACHE_TIMEOUT
+    return timeout
+
+
+def invalidate(key_prefix):
+    """Помечает все страницы с этим префиксом как устаревшие."""
+    cache.set(_version_key(key_prefix), uuid4().hex, None)
+
+
+def invalidate_on_commit(*key_prefixes, using=PRIMARY):
+    """invalidate() после коммита текущей транзакции.
+
+    Версия, сменённая до коммита, позволила бы параллельному запросу
+    собрать страницу по старым данным и сохранить её под новой версией.
+    Вне транзакции сброс выполняется сразу.
+    """
+    def run():
+        for key_prefix in key_prefixes:
+            invalidate(key_prefix)
+    transaction.on_commit(run, using=using)
+
+
+def cache_page_until_changed(key_prefix, timeout=PAGE_CACHE_TIMEOUT,
+                             lock_timeout=PAGE_CACHE_LOCK_TIMEOUT):
+    """Кэширует страницу до вызова invalidate(key_prefix).
+
+    Устаревшую страницу пересобирает один запрос, захвативший блокировку,
+    остальные в это время получают прежнюю версию из кэша. Сборка читает
+    из основной базы: отстающая реплика сохранила бы в кэш старые данные
+    под новой версией. С кэшем на процесс страница живёт не дольше
+    LOCAL_CACHE_TIMEOUT, см. versioned_timeout.
+
+    key_prefix может быть функцией (request, *args, **kwargs), если версия
+    зависит от параметров адреса.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+            prefix = key_prefix
+            if callable(key_prefix):
+                prefix = key_prefix(request, *args, **kwargs)
+            user_prefix = f'{prefix}.{request.user.pk or 0}'
+            version = get_version(prefix)
+            cache_key = get_cache_key(request, user_prefix, 'GET', cache)
+            entry = cache.get(cache_key) if cache_key else None
+            lock_key = None
+            if entry is not None:
+                entry_version, response = entry
+                if entry_version == version:
+                    return response
+                lock_key = f'{cache_key}.lock'
+                if not cache.add(lock_key, True, lock_timeout):
+                    return response
+            try:
+                with use_primary():
+                    response = view_func(request, *args, **kwargs)
+                if (response.status_code == 200
+                        and not response.streaming
+                        and not response.cookies):
+                    page_timeout = versioned_timeout(timeout)
+                    cache_key = learn_cache_key(
+                        request, response, page_timeout, user_prefix, cache)
+                    cache.set(cache_key, (version, response), page_timeout)
+            finally:
+                if lock_key:
+                    cache.delete(lock_key)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,91 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.views.decorators.http import condition
+
+from .models import AuthorStats, Group, Post
+
+
+def _latest(*dates):
+    dates = [date for date in dates if date]
+    return max(dates) if dates else None
+
+
+def _site_state():
+    """Состояние постов, групп и авторов для ETag и дата изменения.
+
+    Максимумы берутся по индексам updated_at. updated_at автора меняется
+    вместе со счётчиками (в том числе при удалении поста) и при правке
+    профиля. Удалённую группу выдаёт их число: групп немного.
+    """
+    groups = Group.objects.aggregate(
+        latest=Max('updated_at'), count=Count('pk'))
+    latest = _latest(
+        Post.objects.aggregate(latest=Max('updated_at'))['latest'],
+        AuthorStats.objects.aggregate(latest=Max('updated_at'))['latest'],
+        groups['latest'],
+    )
+    return [latest, groups['count']], latest
+
+
+def conditional_page(page_meta):
+    """Декоратор condition() с ETag и Last-Modified из page_meta.
+
+    page_meta(request, *args, **kwargs) возвращает (parts, last_modified)
+    или None, если страницы нет. ETag строится только из данных базы:
+    версии в кэше на процесс у разных процессов разные.
+    """
+    def meta(request, *args, **kwargs):
+        if not hasattr(request, '_page_meta'):
+            request._page_meta = page_meta(request, *args, **kwargs)
+        return request._page_meta
+
+    def etag(request, *args, **kwargs):
+        page = meta(request, *args, **kwargs)
+        if page is None:
+            return None
+        parts, _ = page
+        raw = '|'.join(str(part) for part in (
+            request.user.pk,
+            request.get_full_path(),
+            *parts,
+        ))
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        page = meta(request, *args, **kwargs)
+        return page and page[1]
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+def index_meta(request):
+    return _site_state()
+
+
+def group_meta(request, slug):
+    group = Group.objects.filter(slug=slug).values_list(
+        'pk', 'updated_at').first()
+    if group is None:
+        return None
+    state, latest = _site_state()
+    return [*group, *state], _latest(group[1], latest)
+
+
+def profile_meta(request, username):
+    stats = AuthorStats.objects.filter(user__username=username).values_list(
+        'posts_count', 'followers_count', 'following_count').first()
+    if stats is None:
+        return None
+    state, latest = _site_state()
+    return [*stats, *state], latest
+
+
+def post_detail_meta(request, post_id):
+    # Комментарии меняют updated_at поста, см. counters.comment_added.
+    post = Post.objects.filter(pk=post_id).values_list(
+        'updated_at', 'comments_count', 'group__updated_at').first()
+    if post is None:
+        return None
+    state, latest = _site_state()
+    return [*post, *state], _latest(post[0], post[2], latest)
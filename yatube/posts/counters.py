@@ -0,0 +1,110 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import AuthorStats, Comment, Follow, Post, User
+
+
+def _count(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')})
+            .order_by().values(field).annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def reconcile(user_ids=None, post_ids=None):
+    """Пересчитывает счётчики по данным таблиц, возвращает число правок.
+
+    None означает «все строки», пустой список — «ни одной».
+    """
+    users = User.objects.all()
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    AuthorStats.objects.bulk_create(
+        [
+            AuthorStats(user_id=pk) for pk in
+            users.filter(stats__isnull=True).values_list('pk', flat=True)
+        ],
+        ignore_conflicts=True,
+    )
+    stats = AuthorStats.objects.filter(user__in=users).annotate(
+        actual_posts=_count(Post.objects, 'author'),
+        actual_followers=_count(Follow.objects, 'author'),
+        actual_following=_count(Follow.objects, 'user'),
+    )
+    drifted_stats = stats.exclude(
+        posts_count=F('actual_posts'),
+        followers_count=F('actual_followers'),
+        following_count=F('actual_following'),
+    ).values_list('pk', flat=True)
+    fixed = AuthorStats.objects.filter(pk__in=list(drifted_stats)).update(
+        posts_count=_count(Post.objects, 'author'),
+        followers_count=_count(Follow.objects, 'author'),
+        following_count=_count(Follow.objects, 'user'),
+        updated_at=timezone.now(),
+    )
+    posts = Post.objects.all()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    drifted_posts = posts.annotate(
+        actual_comments=_count(Comment.objects, 'post'),
+    ).exclude(comments_count=F('actual_comments')).values_list(
+        'pk', flat=True)
+    fixed += Post.objects.filter(pk__in=list(drifted_posts)).update(
+        comments_count=_count(Comment.objects, 'post'),
+        updated_at=timezone.now(),
+    )
+    return fixed
+
+
+def _shift(field, delta):
+    if delta < 0:
+        return Greatest(F(field) + delta, 0)
+    return F(field) + delta
+
+
+def _add(user_id, field, delta):
+    # Отсутствующую строку не создаём: её пересчитает get_stats или
+    # reconcile_counters, а при каскадном удалении она и не нужна.
+    AuthorStats.objects.filter(user_id=user_id).update(
+        updated_at=timezone.now(), **{field: _shift(field, delta)}
+    )
+
+
+def post_added(post, delta=1):
+    _add(post.author_id, 'posts_count', delta)
+
+
+def comment_added(comment, delta=1):
+    # updated_at поста отражает и его комментарии, см. post_detail_meta.
+    Post.objects.filter(pk=comment.post_id).update(
+        comments_count=_shift('comments_count', delta),
+        updated_at=timezone.now(),
+    )
+
+
+def follow_added(follow, delta=1):
+    _add(follow.author_id, 'followers_count', delta)
+    _add(follow.user_id, 'following_count', delta)
+
+
+def follows_changed(user_id, author_ids, delta):
+    """Счётчики для пакета подписок (delta=1) или отписок (delta=-1)."""
+    AuthorStats.objects.filter(user_id__in=author_ids).update(
+        followers_count=_shift('followers_count', delta),
+        updated_at=timezone.now(),
+    )
+    _add(user_id, 'following_count', delta * len(author_ids))
+
+
+def get_stats(user):
+    """Счётчики пользователя; недостающая строка создаётся пересчётом."""
+    try:
+        return user.stats
+    except AuthorStats.DoesNotExist:
+        reconcile(user_ids=[user.pk], post_ids=[])
+        return AuthorStats.objects.get(user=user)
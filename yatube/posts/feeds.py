@@ -0,0 +1,207 @@
+import json
+
+from django.contrib.syndication.views import Feed
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.text import Truncator
+
+from yatube.settings import FEED_CHUNK_SIZE, FEED_ITEMS, FEED_MAX_ITEMS
+
+from .cache import cache_page_until_changed, feed_prefix, get_version
+from .conditional import conditional_page, index_meta
+from .models import Group, Post, User
+
+FEED_TYPES = {'rss': Rss201rev2Feed, 'atom': Atom1Feed}
+JSON_FEED_TYPE = 'application/feed+json; charset=utf-8'
+JSON_FEED_VERSION = 'https://jsonfeed.org/version/1.1'
+TITLE_WORDS = 10
+
+
+def _author_name(user):
+    return user.get_full_name() or user.username
+
+
+class LatestPostsFeed(Feed):
+    """Последние посты всех авторов."""
+
+    def __init__(self, feed_type=Rss201rev2Feed):
+        self.feed_type = feed_type
+
+    def posts(self, obj):
+        return Post.objects.select_related('author', 'group')
+
+    def items(self, obj):
+        return self.posts(obj)[:FEED_ITEMS]
+
+    def title(self, obj):
+        return 'Последние обновления на сайте'
+
+    def description(self, obj):
+        return 'Новые посты всех авторов'
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+    def link(self, obj):
+        return reverse('posts:index')
+
+    def item_title(self, post):
+        return Truncator(post.text).words(TITLE_WORDS)
+
+    def item_description(self, post):
+        return post.text
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_updateddate(self, post):
+        return post.updated_at
+
+    def item_author_name(self, post):
+        return _author_name(post.author)
+
+    def item_categories(self, post):
+        return [post.group.title] if post.group else []
+
+    def json_item(self, post, request):
+        """Пост в формате JSON Feed 1.1."""
+        item = {
+            'id': str(post.pk),
+            'url': request.build_absolute_uri(post.get_absolute_url()),
+            'title': self.item_title(post),
+            'content_text': post.text,
+            'date_published': post.pub_date.isoformat(),
+            'date_modified': post.updated_at.isoformat(),
+            'authors': [{
+                'name': _author_name(post.author),
+                'url': request.build_absolute_uri(reverse(
+                    'posts:profile', args=[post.author.username])),
+            }],
+            'tags': self.item_categories(post),
+        }
+        if post.image:
+            item['image'] = request.build_absolute_uri(post.image.url)
+        return item
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def posts(self, group):
+        return group.posts.select_related('author', 'group')
+
+    def title(self, group):
+        return group.title
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return group.get_absolute_url()
+
+
+class ProfilePostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def posts(self, author):
+        return author.posts.select_related('author', 'group')
+
+    def title(self, author):
+        return f'Все посты пользователя {_author_name(author)}'
+
+    def description(self, author):
+        return self.title(author)
+
+    def link(self, author):
+        return reverse('posts:profile', args=[author.username])
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', FEED_ITEMS))
+    except ValueError:
+        return FEED_ITEMS
+    return min(max(limit, 1), FEED_MAX_ITEMS)
+
+
+def json_chunks(feed, obj, request, limit):
+    """JSON Feed по частям: посты читаются по FEED_CHUNK_SIZE за запрос."""
+    header = json.dumps({
+        'version': JSON_FEED_VERSION,
+        'title': feed.title(obj),
+        'home_page_url': request.build_absolute_uri(feed.link(obj)),
+        'feed_url': request.build_absolute_uri(),
+        'description': feed.description(obj),
+    }, ensure_ascii=False)
+    yield (header[:-1] + ', "items": [').encode()
+    posts = feed.posts(obj)[:limit].iterator(chunk_size=FEED_CHUNK_SIZE)
+    for number, post in enumerate(posts):
+        item = json.dumps(feed.json_item(post, request), ensure_ascii=False)
+        yield (',' + item if number else item).encode()
+    yield b']}'
+
+
+def json_feed(feed, request, **kwargs):
+    """До FEED_ITEMS постов — обычный ответ, больше — поток.
+
+    Потоковый ответ не попадает в кэш страниц, зато память не растёт
+    с размером выгрузки.
+    """
+    obj = feed.get_object(request, **kwargs)
+    limit = _limit(request)
+    chunks = json_chunks(feed, obj, request, limit)
+    if limit > FEED_ITEMS:
+        return StreamingHttpResponse(chunks, content_type=JSON_FEED_TYPE)
+    return HttpResponse(b''.join(chunks), content_type=JSON_FEED_TYPE)
+
+
+def _feed_prefix(request, kind, slug=None, username=None):
+    """Префикс версии ленты; id группы или автора ищется по адресу.
+
+    Несуществующей группе или автору достаётся id 0: такая лента
+    отвечает 404 и в кэш не попадает.
+    """
+    if not hasattr(request, '_feed_prefix'):
+        if slug:
+            prefix = feed_prefix(group_id=Group.objects.filter(
+                slug=slug).values_list('pk', flat=True).first() or 0)
+        elif username:
+            prefix = feed_prefix(author_id=User.objects.filter(
+                username=username).values_list('pk', flat=True).first() or 0)
+        else:
+            prefix = feed_prefix()
+        request._feed_prefix = prefix
+    return request._feed_prefix
+
+
+def _feed_meta(request, kind, **kwargs):
+    parts, latest = index_meta(request)
+    prefix = _feed_prefix(request, kind, **kwargs)
+    return [*parts, get_version(prefix)], latest
+
+
+def feed_view(feed_class):
+    """Представление ленты в формате kind: rss, atom или json."""
+    feeds = {
+        kind: feed_class(feed_type) for kind, feed_type in FEED_TYPES.items()
+    }
+    feed = feed_class()
+
+    @conditional_page(_feed_meta)
+    @cache_page_until_changed(_feed_prefix)
+    def view(request, kind, **kwargs):
+        if kind == 'json':
+            return json_feed(feed, request, **kwargs)
+        if kind not in feeds:
+            raise Http404('Неизвестный формат ленты.')
+        return feeds[kind](request, **kwargs)
+    return view
+
+
+index_feed = feed_view(LatestPostsFeed)
+group_feed = feed_view(GroupPostsFeed)
+profile_feed = feed_view(ProfilePostsFeed)
@@ -0,0 +1,136 @@
+from array import array
+from bisect import bisect_left
+
+from django.core.cache import cache
+from django.db import connections, router, transaction
+
+from core.db import PRIMARY, use_primary
+
+from yatube.settings import FOLLOWING_TIMEOUT
+
+from . import counters, timeline
+from .cache import get_version, invalidate, versioned_timeout
+from .models import Follow
+
+
+def following_prefix(user_id):
+    return f'following:{user_id}'
+
+
+def get_following(user_id):
+    """Отсортированный array id авторов, на которых подписан пользователь.
+
+    Массив целых занимает в кэше по 8 байт на подписку, проверка
+    подписки — бинарный поиск без обращения к таблице Follow. Версия
+    читается до выборки: если подписка закоммитится во время сборки,
+    массив ляжет под старую версию, которую уже никто не прочитает.
+    Внутри транзакции массив кладётся в кэш только после коммита, чтобы
+    туда не попали незакоммиченные подписки.
+    """
+    prefix = following_prefix(user_id)
+    key = f'{prefix}.{get_version(prefix)}'
+    ids = cache.get(key)
+    if ids is None:
+        with use_primary():
+            ids = array('q', sorted(
+                Follow.objects.filter(user_id=user_id)
+                .values_list('author_id', flat=True)
+            ))
+        transaction.on_commit(
+            lambda: cache.set(key, ids, versioned_timeout(FOLLOWING_TIMEOUT)),
+            using=PRIMARY)
+    return ids
+
+
+def contains(ids, author_id):
+    """Есть ли author_id в массиве из get_following (бинарный поиск)."""
+    index = bisect_left(ids, author_id)
+    return index < len(ids) and ids[index] == author_id
+
+
+def is_following(user_id, author_id):
+    return contains(get_following(user_id), author_id)
+
+
+def forget(user_id, using=PRIMARY):
+    """Сбрасывает набор после коммита, следующее чтение соберёт его из БД.
+
+    Набор не правится на месте: параллельная сборка могла бы затереть
+    правку, а откаченная транзакция — оставить в кэше несуществующую
+    подписку.
+    """
+    transaction.on_commit(
+        lambda: invalidate(following_prefix(user_id)),
+        using=using)
+
+
+def _columns(db):
+    quote = db.ops.quote_name
+    return (
+        quote(Follow._meta.db_table),
+        quote(Follow._meta.get_field('user').column),
+        quote(Follow._meta.get_field('author').column),
+    )
+
+
+def _insert(db, user_id, author_ids):
+    """INSERT ... ON CONFLICT DO NOTHING, возвращает число новых строк."""
+    table, user_column, author_column = _columns(db)
+    sql = '{} {} ({}, {}) VALUES {} {}'.format(
+        db.ops.insert_statement(ignore_conflicts=True),
+        table, user_column, author_column,
+        ', '.join(['(%s, %s)'] * len(author_ids)),
+        db.ops.ignore_conflicts_suffix_sql(ignore_conflicts=True),
+    )
+    params = [value for author_id in author_ids
+              for value in (user_id, author_id)]
+    with db.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def _delete(db, user_id, author_ids):
+    table, user_column, author_column = _columns(db)
+    sql = 'DELETE FROM {} WHERE {} = %s AND {} IN ({})'.format(
+        table, user_column, author_column,
+        ', '.join(['%s'] * len(author_ids)),
+    )
+    with db.cursor() as cursor:
+        cursor.execute(sql, [user_id, *author_ids])
+        return cursor.rowcount
+
+
+def _change(user, author_ids, write, delta):
+    author_ids = sorted({pk for pk in author_ids if pk != user.pk})
+    if not author_ids:
+        return 0
+    using = router.db_for_write(Follow)
+    with transaction.atomic(using=using):
+        changed = write(connections[using], user.pk, author_ids)
+        if changed and delta > 0:
+            timeline.follow(user.pk, author_ids, using=using)
+        elif changed:
+            timeline.unfollow(user.pk, author_ids, using=using)
+        if changed == len(author_ids):
+            counters.follows_changed(user.pk, author_ids, delta)
+        elif changed:
+            # Часть строк уже была (или её вставил параллельный запрос), а
+            # какая именно — неизвестно: счётчики пересчитываются.
+            counters.reconcile(user_ids=[user.pk, *author_ids], post_ids=[])
+    forget(user.pk, using=using)
+    return changed
+
+
+def follow_authors(user, author_ids):
+    """Подписывает на авторов одним запросом, возвращает число новых подписок.
+
+    Повторная подписка, в том числе из параллельного запроса, не
+    нарушает unique_follower: конфликтующие строки пропускаются. Запись
+    идёт в обход сигналов Follow, счётчики меняются в той же транзакции.
+    """
+    return _change(user, author_ids, _insert, 1)
+
+
+def unfollow_authors(user, author_ids):
+    """Отписывает от авторов одним DELETE, возвращает число удалённых."""
+    return _change(user, author_ids, _delete, -1)
@@ -1,13 +1,64 @@
 from django import forms
+from django.core.exceptions import ValidationError
+
+from yatube.settings import (IMAGE_UPLOAD_FORMATS, IMAGE_UPLOAD_MAX_PIXELS,
+                             UPLOAD_MAX_SIZE)
 
 from .models import Post, Comment, Group
 
 
 class PostForm(forms.ModelForm):
+    error_messages = {
+        'too_large': 'Файл больше %(limit)d МБ.',
+        'unsupported_format': 'Формат %(format)s не поддерживается.',
+        'too_many_pixels': 'Картинка больше %(limit)d мегапикселей.',
+    }
+
     class Meta:
         model = Post
         fields = ('text', 'group', 'image',)
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Содержимое слишком большого файла отбросил LimitedUploadHandler,
+        # ImageField не должен принять пустой файл за битую картинку.
+        self.image_too_large = getattr(
+            self.files.get('image'), 'too_large', False)
+        if self.image_too_large:
+            self.files = self.files.copy()
+            del self.files['image']
+
+    def clean_image(self):
+        """Проверяет формат и размер картинки по её заголовку.
+
+        ImageField открывает загрузку по пути временного файла и вызывает
+        только verify(), пиксели не декодируются. Здесь отсекается
+        картинка, которая при декодировании заняла бы слишком много
+        памяти, — до того как её распакует хранилище или sorl.
+        """
+        image = self.cleaned_data['image']
+        if self.image_too_large:
+            raise ValidationError(
+                self.error_messages['too_large'], code='too_large',
+                params={'limit': UPLOAD_MAX_SIZE // 2 ** 20},
+            )
+        header = getattr(image, 'image', None)
+        if header is None:
+            return image
+        if header.format not in IMAGE_UPLOAD_FORMATS:
+            raise ValidationError(
+                self.error_messages['unsupported_format'],
+                code='unsupported_format', params={'format': header.format},
+            )
+        width, height = header.size
+        if width * height > IMAGE_UPLOAD_MAX_PIXELS:
+            raise ValidationError(
+                self.error_messages['too_many_pixels'],
+                code='too_many_pixels',
+                params={'limit': IMAGE_UPLOAD_MAX_PIXELS // 10 ** 6},
+            )
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводит счета популярного к текущему поколению и удаляет '
+        'затухшие. Запускать хотя бы раз за TRENDING_HALF_LIFE.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='пересчитать счета по комментариям и постам из БД',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            trending.rebuild()
+            self.stdout.write('Рейтинг пересчитан')
+            return
+        deleted = trending.compact()
+        self.stdout.write(f'Удалено затухших строк: {deleted}')
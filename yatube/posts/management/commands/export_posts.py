@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.transfer import FORMATS, export_rows, guess_format, write
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты в NDJSON или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', help='файл для выгрузки, по умолчанию stdout')
+        parser.add_argument('--format', choices=FORMATS)
+
+    def handle(self, *args, **options):
+        path = options['output']
+        fmt = options['format'] or guess_format(path)
+        rows = export_rows(Post.objects.all())
+        if not path:
+            count = write(rows, self.stdout, fmt)
+        else:
+            with open(path, 'w', encoding='utf-8', newline='') as output:
+                count = write(rows, output, fmt)
+        self.stderr.write(f'Выгружено постов: {count}')
@@ -0,0 +1,31 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import BATCH_SIZE, FORMATS, Importer, guess_format, read
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты из NDJSON или CSV пакетами INSERT через '
+        'executemany; строки с ошибками пропускаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='файл с постами или - для stdin')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        importer = Importer(batch_size=options['batch_size'])
+        if path == '-':
+            importer.run(read(sys.stdin, fmt))
+        else:
+            with open(path, encoding='utf-8', newline='') as source:
+                importer.run(read(source, fmt))
+        self.stdout.write(
+            f'Загружено постов: {importer.imported}, '
+            f'пропущено: {importer.skipped}'
+        )
@@ -0,0 +1,75 @@
+from django.db import migrations
+
+FORWARD_SQL = (
+    "CREATE VIRTUAL TABLE posts_post_fts USING fts5("
+    "text, content='posts_post', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+    "CREATE TRIGGER posts_post_fts_insert AFTER INSERT ON posts_post BEGIN "
+    "INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text); "
+    "END",
+    "CREATE TRIGGER posts_post_fts_delete AFTER DELETE ON posts_post BEGIN "
+    "INSERT INTO posts_post_fts(posts_post_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "END",
+    "CREATE TRIGGER posts_post_fts_update AFTER UPDATE OF text "
+    "ON posts_post BEGIN "
+    "INSERT INTO posts_post_fts(posts_post_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text); "
+    "END",
+    "CREATE VIRTUAL TABLE posts_group_fts USING fts5("
+    "title, description, content='posts_group', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+    "CREATE TRIGGER posts_group_fts_insert AFTER INSERT ON posts_group BEGIN "
+    "INSERT INTO posts_group_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); "
+    "END",
+    "CREATE TRIGGER posts_group_fts_delete AFTER DELETE ON posts_group BEGIN "
+    "INSERT INTO posts_group_fts(posts_group_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "END",
+    "CREATE TRIGGER posts_group_fts_update AFTER UPDATE OF title, description "
+    "ON posts_group BEGIN "
+    "INSERT INTO posts_group_fts(posts_group_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO posts_group_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); "
+    "END",
+    "INSERT INTO posts_post_fts(posts_post_fts) VALUES ('rebuild')",
+    "INSERT INTO posts_group_fts(posts_group_fts) VALUES ('rebuild')",
+)
+
+REVERSE_SQL = (
+    'DROP TRIGGER IF EXISTS posts_post_fts_insert',
+    'DROP TRIGGER IF EXISTS posts_post_fts_delete',
+    'DROP TRIGGER IF EXISTS posts_post_fts_update',
+    'DROP TABLE IF EXISTS posts_post_fts',
+    'DROP TRIGGER IF EXISTS posts_group_fts_insert',
+    'DROP TRIGGER IF EXISTS posts_group_fts_delete',
+    'DROP TRIGGER IF EXISTS posts_group_fts_update',
+    'DROP TABLE IF EXISTS posts_group_fts',
+)
+
+
+def _run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        # Полнотекстовый индекс есть только у SQLite (FTS5), на других
+        # СУБД поиск работает через icontains.
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run_on_sqlite(FORWARD_SQL), _run_on_sqlite(REVERSE_SQL)
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-17 06:10
+
+from django.db import migrations, models
+
+
+def fill_updated_at(apps, schema_editor):
+    # Для старых строк датой изменения считается дата публикации.
+    db_alias = schema_editor.connection.alias
+    for model_name in ('Comment', 'Group', 'Post'):
+        model = apps.get_model('posts', model_name)
+        model.objects.using(db_alias).update(updated_at=models.F('pub_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Дата изменения'),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Дата изменения'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Дата изменения'),
+        ),
+        migrations.RunPython(fill_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 2.2.16 on 2026-10-17 06:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_drop_redundant_fk_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupTrend',
+            fields=[
+                ('score', models.FloatField(default=0, verbose_name='Популярность')),
+                ('generation', models.IntegerField(db_index=True, default=0, verbose_name='Поколение')),
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trend', serialize=False, to='posts.Group', verbose_name='Группа')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='PostTrend',
+            fields=[
+                ('score', models.FloatField(default=0, verbose_name='Популярность')),
+                ('generation', models.IntegerField(db_index=True, default=0, verbose_name='Поколение')),
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trend', serialize=False, to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 2.2.16 on 2026-10-17 07:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Ленты собираются из уже существующих подписок и постов.
+BACKFILL_SQL = (
+    'INSERT INTO posts_timelineentry (user_id, post_id, pub_date) '
+    'SELECT f.user_id, p.id, p.pub_date FROM posts_follow f '
+    'JOIN posts_post p ON p.author_id = f.author_id'
+)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0019_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorstats',
+            name='is_celebrity',
+            field=models.BooleanField(db_index=True, default=False, help_text='Посты автора подмешиваются в ленты подписок при чтении', verbose_name='Без рассылки в ленты'),
+        ),
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='posts.Post', verbose_name='Пост')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to=settings.AUTH_USER_MODEL, verbose_name='Читатель')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-pub_date', '-post'], name='timeline_user_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_timeline_entry'),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
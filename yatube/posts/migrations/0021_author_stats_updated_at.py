@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-17 07:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_timeline_entries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorstats',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Дата изменения'),
+        ),
+    ]
@@ -6,6 +6,8 @@ from core.models import CreatedModel
 
 from yatube.settings import MODEL_STR_METHOD_LENGHT
 
+from .storage import ContentAddressedStorage
+
 User = get_user_model()
 
 
@@ -42,11 +44,15 @@ class Post(CreatedModel):
         on_delete=models.CASCADE,
         related_name='posts',
         verbose_name='Автор',
+        # Выборки по автору и группе покрывают составные индексы из Meta,
+        # отдельные индексы внешних ключей только замедляют вставку.
+        db_index=False,
     )
     group = models.ForeignKey(
         Group,
         on_delete=models.SET_NULL,
         related_name='posts',
+        db_index=False,
         blank=True,
         null=True,
         verbose_name='Группа',
@@ -55,11 +61,31 @@ class Post(CreatedModel):
     image = models.ImageField(
         verbose_name='Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True,
     )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Комментариев',
+    )
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx',
+            ),
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date_id_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:MODEL_STR_METHOD_LENGHT]
@@ -88,6 +114,12 @@ class Comment(CreatedModel):
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['post', '-pub_date'],
+                name='comment_post_pub_date_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:MODEL_STR_METHOD_LENGHT]
@@ -115,3 +147,119 @@ class Follow(models.Model):
                 name='unique_follower'
             )
         ]
+
+
+class TimelineEntry(models.Model):
+    """Пост в ленте подписок читателя, см. posts.timeline."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Читатель',
+        # Покрывается индексами из Meta.
+        db_index=False,
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return str(self.post)
+
+
+class AuthorStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Постов',
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписчиков',
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписок',
+    )
+    is_celebrity = models.BooleanField(
+        default=False,
+        db_index=True,
+        verbose_name='Без рассылки в ленты',
+        help_text='Посты автора подмешиваются в ленты подписок при чтении',
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+        db_index=True,
+    )
+
+    def __str__(self):
+        return str(self.user)
+
+
+class Trend(models.Model):
+    """Затухающий счётчик событий, см. posts.trending."""
+    score = models.FloatField(
+        default=0,
+        verbose_name='Популярность',
+    )
+    generation = models.IntegerField(
+        default=0,
+        db_index=True,
+        verbose_name='Поколение',
+    )
+
+    class Meta:
+        abstract = True
+
+
+class PostTrend(Trend):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trend',
+        verbose_name='Пост',
+    )
+
+    def __str__(self):
+        return str(self.post)
+
+
+class GroupTrend(Trend):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trend',
+        verbose_name='Группа',
+    )
+
+    def __str__(self):
+        return str(self.group)
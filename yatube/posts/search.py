@@ -0,0 +1,217 @@
+import base64
+import binascii
+import re
+from contextlib import contextmanager
+
+from django.db import connection, connections
+
+from yatube.settings import POSTS_PER_PAGE
+
+from .models import Group, Post
+
+MAX_TERMS = 10
+GROUPS_LIMIT = 5
+# bm25 считается окнами по SEARCH_CANDIDATES самых новых совпадений:
+# частое слово иначе заставляет ранжировать всю таблицу ради одной
+# страницы. Внутри окна посты идут по релевантности, окна — от новых
+# к старым.
+SEARCH_CANDIDATES = 1000
+# Верхняя граница rowid первого окна.
+MAX_ROWID = 2 ** 63 - 1
+
+WINDOW_SQL = (
+    'SELECT min(rowid), count(*) FROM ('
+    '  SELECT rowid FROM posts_post_fts'
+    '  WHERE posts_post_fts MATCH %s AND rowid <= %s'
+    '  ORDER BY rowid DESC LIMIT %s'
+    ')'
+)
+POSTS_SQL = (
+    'SELECT rowid, score FROM ('
+    '  SELECT rowid, bm25(posts_post_fts) AS score FROM posts_post_fts'
+    '  WHERE posts_post_fts MATCH %s AND rowid BETWEEN %s AND %s'
+    ') WHERE score > %s OR (score = %s AND rowid > %s)'
+    ' ORDER BY score, rowid LIMIT %s'
+)
+GROUPS_SQL = (
+    'SELECT rowid FROM posts_group_fts WHERE posts_group_fts MATCH %s'
+    ' ORDER BY bm25(posts_group_fts, 10.0, 1.0) LIMIT %s'
+)
+
+# Копия триггеров из миграции 0015. SQLite пересоздаёт таблицу при
+# изменении схемы (AddField и т. п.), и триггеры при этом пропадают,
+# поэтому после каждой миграции они восстанавливаются.
+TRIGGERS_SQL = (
+    "CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert "
+    "AFTER INSERT ON posts_post BEGIN "
+    "INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS posts_post_fts_delete "
+    "AFTER DELETE ON posts_post BEGIN "
+    "INSERT INTO posts_post_fts(posts_post_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS posts_post_fts_update "
+    "AFTER UPDATE OF text ON posts_post BEGIN "
+    "INSERT INTO posts_post_fts(posts_post_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS posts_group_fts_insert "
+    "AFTER INSERT ON posts_group BEGIN "
+    "INSERT INTO posts_group_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS posts_group_fts_delete "
+    "AFTER DELETE ON posts_group BEGIN "
+    "INSERT INTO posts_group_fts(posts_group_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS posts_group_fts_update "
+    "AFTER UPDATE OF title, description ON posts_group BEGIN "
+    "INSERT INTO posts_group_fts(posts_group_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO posts_group_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); "
+    "END",
+)
+
+
+def _has_fts(db):
+    with db.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'table' "
+            "AND name IN ('posts_post_fts', 'posts_group_fts')"
+        )
+        return cursor.fetchone()[0] == 2
+
+
+def restore_triggers(using):
+    """Создаёт недостающие триггеры полнотекстового индекса."""
+    db = connections[using]
+    if db.vendor != 'sqlite' or not _has_fts(db):
+        return
+    with db.cursor() as cursor:
+        for statement in TRIGGERS_SQL:
+            cursor.execute(statement)
+
+
+@contextmanager
+def deferred_post_index(using):
+    """Индексирует вставленные в блоке посты одним запросом в конце.
+
+    Вызывается внутри транзакции: триггер вставки снимается и
+    возвращается в ней же, так что другие соединения его отсутствия не
+    видят. Построчный триггер с префиксными индексами в разы дороже
+    одной вставки INSERT ... SELECT.
+    """
+    db = connections[using]
+    if db.vendor != 'sqlite' or not _has_fts(db):
+        yield
+        return
+    with db.cursor() as cursor:
+        cursor.execute('SELECT coalesce(max(id), 0) FROM posts_post')
+        last_id = cursor.fetchone()[0]
+        cursor.execute('DROP TRIGGER posts_post_fts_insert')
+    yield
+    with db.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO posts_post_fts(rowid, text) '
+            'SELECT id, text FROM posts_post WHERE id > %s', [last_id]
+        )
+        cursor.execute(TRIGGERS_SQL[0])
+
+
+def build_query(text):
+    """Превращает ввод пользователя в запрос FTS5: все слова по префиксу."""
+    terms = re.findall(r'\w+', text.lower())[:MAX_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _encode(top, score, rowid):
+    raw = f'{top}|{score!r}|{rowid}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode(token):
+    """(верхний rowid окна, score, rowid) последнего поста или None."""
+    try:
+        raw = base64.urlsafe_b64decode(
+            token + '=' * (-len(token) % 4)
+        ).decode()
+        top, score, rowid = raw.split('|')
+        return int(top), float(score), int(rowid)
+    except (ValueError, TypeError, UnicodeDecodeError, binascii.Error):
+        return None
+
+
+def _in_order(queryset, ids):
+    objects = queryset.in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
+
+
+def _ranked_rows(query, position, limit):
+    """До limit строк (rowid, score, top) после позиции курсора.
+
+    Окно — SEARCH_CANDIDATES самых новых совпадений с rowid не больше
+    top. Когда окно исчерпано, поиск продолжается в следующем.
+    """
+    top, score, rowid = position
+    rows = []
+    with connection.cursor() as db:
+        while len(rows) < limit:
+            db.execute(WINDOW_SQL, [query, top, SEARCH_CANDIDATES])
+            low, count = db.fetchone()
+            if not count:
+                break
+            db.execute(POSTS_SQL, [
+                query, low, top, score, score, rowid, limit - len(rows)
+            ])
+            rows += [(pk, rank, top) for pk, rank in db.fetchall()]
+            if count < SEARCH_CANDIDATES:
+                break
+            top, score, rowid = low - 1, float('-inf'), 0
+    return rows
+
+
+def search_posts(text, cursor=None, per_page=POSTS_PER_PAGE):
+    """Посты по релевантности и токен следующей страницы.
+
+    Без FTS5 (не SQLite) посты ищутся через icontains от новых к старым,
+    курсор тогда хранит только верхнюю границу id.
+    """
+    query = build_query(text)
+    if not query:
+        return [], None
+    posts = Post.objects.select_related('author', 'group')
+    position = (_decode(cursor) if cursor else None) or (
+        MAX_ROWID, float('-inf'), 0)
+    if connection.vendor != 'sqlite':
+        found = list(
+            posts.filter(text__icontains=text, pk__lte=position[0])
+            .order_by('-pk')[:per_page + 1]
+        )
+        next_cursor = None
+        if len(found) > per_page:
+            found = found[:per_page]
+            next_cursor = _encode(found[-1].pk - 1, float('-inf'), 0)
+        return found, next_cursor
+    rows = _ranked_rows(query, position, per_page + 1)
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        rowid, score, top = rows[-1]
+        next_cursor = _encode(top, score, rowid)
+    return _in_order(posts, [row[0] for row in rows]), next_cursor
+
+
+def search_groups(text, limit=GROUPS_LIMIT):
+    query = build_query(text)
+    if not query:
+        return []
+    if connection.vendor != 'sqlite':
+        return list(Group.objects.filter(title__icontains=text)[:limit])
+    with connection.cursor() as db:
+        db.execute(GROUPS_SQL, [query, limit])
+        ids = [row[0] for row in db.fetchall()]
+    return _in_order(Group.objects.all(), ids)
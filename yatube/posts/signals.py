@@ -0,0 +1,172 @@
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import counters, follows, search, timeline, trending
+from .cache import (INDEX_PAGE_PREFIX, POST_CARD_PREFIX, feed_prefix,
+                    feed_prefixes, invalidate_on_commit)
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=User)
+def invalidate_index_page(sender, using, **kwargs):
+    invalidate_on_commit(INDEX_PAGE_PREFIX, using=using)
+
+
+@receiver(post_save, sender=User)
+def invalidate_index_page_on_user_change(sender, instance, using,
+                                         update_fields=None, **kwargs):
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    invalidate_on_commit(
+        INDEX_PAGE_PREFIX, f'{POST_CARD_PREFIX}.user.{instance.pk}',
+        using=using)
+
+
+@receiver(post_save, sender=Post)
+def invalidate_post_card(sender, instance, using, **kwargs):
+    invalidate_on_commit(f'{POST_CARD_PREFIX}.post.{instance.pk}', using=using)
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_post_cards(sender, instance, using, **kwargs):
+    invalidate_on_commit(f'{POST_CARD_PREFIX}.group.{instance.pk}',
+                         using=using)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, using, **kwargs):
+    invalidate_on_commit(*feed_prefixes(instance), using=using)
+
+
+@receiver(pre_save, sender=Post)
+def invalidate_previous_group_feed(sender, instance, using, **kwargs):
+    # Пост перенесли в другую группу — из ленты прежней он должен пропасть.
+    if instance.pk is None:
+        return
+    group_id = (
+        Post.objects.using(using).filter(pk=instance.pk)
+        .exclude(group_id=instance.group_id)
+        .values_list('group_id', flat=True).first()
+    )
+    if group_id:
+        invalidate_on_commit(feed_prefix(group_id=group_id), using=using)
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_feed(sender, instance, using, **kwargs):
+    invalidate_on_commit(feed_prefix(group_id=instance.pk), using=using)
+
+
+@receiver(post_save, sender=User)
+def invalidate_profile_feed(sender, instance, using, update_fields=None,
+                            **kwargs):
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    invalidate_on_commit(feed_prefix(author_id=instance.pk), using=using)
+
+
+@receiver(post_save, sender=Post)
+def push_post_to_timelines(sender, instance, created, using, **kwargs):
+    if created:
+        timeline.push_post(instance, using=using)
+
+
+@receiver(post_save, sender=Follow)
+def add_author_to_timeline(sender, instance, created, using, **kwargs):
+    if created:
+        timeline.follow(instance.user_id, [instance.author_id], using=using)
+
+
+@receiver(post_delete, sender=Follow)
+def remove_author_from_timeline(sender, instance, using, **kwargs):
+    timeline.unfollow(instance.user_id, [instance.author_id], using=using)
+
+
+@receiver(post_save, sender=Follow)
+def add_to_following(sender, instance, created, **kwargs):
+    if created:
+        follows.forget(instance.user_id)
+
+
+@receiver(post_delete, sender=Follow)
+def remove_from_following(sender, instance, **kwargs):
+    follows.forget(instance.user_id)
+
+
+@receiver(post_delete, sender=User)
+def forget_following(sender, instance, **kwargs):
+    follows.forget(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def create_author_stats(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=User)
+def touch_author_stats(sender, instance, created, using, update_fields=None,
+                       **kwargs):
+    # Имя автора есть на страницах, их ETag следит за updated_at.
+    if created or update_fields and set(update_fields) == {'last_login'}:
+        return
+    AuthorStats.objects.using(using).filter(user=instance).update(
+        updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Post)
+def increment_posts_count(sender, instance, created, **kwargs):
+    if created:
+        counters.post_added(instance)
+
+
+@receiver(post_delete, sender=Post)
+def decrement_posts_count(sender, instance, **kwargs):
+    counters.post_added(instance, -1)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comments_count(sender, instance, created, **kwargs):
+    if created:
+        counters.comment_added(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comments_count(sender, instance, **kwargs):
+    counters.comment_added(instance, -1)
+
+
+@receiver(post_save, sender=Post)
+def add_post_to_trending(sender, instance, created, **kwargs):
+    if created:
+        trending.post_added(instance)
+
+
+@receiver(post_save, sender=Comment)
+def add_comment_to_trending(sender, instance, created, **kwargs):
+    if created:
+        trending.comment_added(instance)
+
+
+@receiver(post_save, sender=Follow)
+def increment_follow_counts(sender, instance, created, **kwargs):
+    if created:
+        counters.follow_added(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def decrement_follow_counts(sender, instance, **kwargs):
+    counters.follow_added(instance, -1)
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    if sender.name == 'posts':
+        search.restore_triggers(using)
@@ -0,0 +1,71 @@
+import hashlib
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from PIL import Image, ImageOps
+
+EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'GIF': '.gif', 'WEBP': '.webp'}
+# Форматы, которые пересохраняются без метаданных. GIF бывает
+# анимированным и почти никогда не несёт EXIF, его байты не меняются.
+CLEANED_FORMATS = ('JPEG', 'PNG', 'WEBP')
+JPEG_QUALITY = 90
+
+
+def strip_metadata(content):
+    """Возвращает (файл без EXIF и текстовых блоков или None, формат Pillow).
+
+    Поворот из EXIF применяется к пикселям. Если поворачивать не нужно,
+    JPEG сохраняется с исходными таблицами квантования (quality='keep')
+    и почти не теряет качества. None значит, что файл сохраняется как
+    есть: это GIF, анимация или данные, которые Pillow не распознал (их
+    отсеивает валидация формы).
+    """
+    try:
+        image = Image.open(content)
+        image_format = image.format
+        if (image_format not in CLEANED_FORMATS
+                or getattr(image, 'is_animated', False)):
+            return None, image_format
+        transposed = ImageOps.exif_transpose(image)
+        params = {'icc_profile': image.info.get('icc_profile')}
+        if image_format == 'JPEG':
+            params['quality'] = (
+                'keep' if transposed is image else JPEG_QUALITY)
+        output = BytesIO()
+        transposed.save(output, image_format, **params)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None, None
+    finally:
+        content.seek(0)
+    return ContentFile(output.getvalue()), image_format
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, в котором имя файла — sha256 очищенного содержимого.
+
+    upload_to поля задаёт только каталог: posts/ab/abcdef….jpg. Одна и
+    та же картинка, загруженная повторно (в том числе с другими
+    метаданными), получает имя уже лежащего файла и места не занимает.
+    Файлы не удаляются вместе с постами, поэтому общие имена безопасны.
+    Хеш считается по кускам, файл целиком в память не читается.
+    """
+
+    def _save(self, name, content):
+        content.seek(0)
+        cleaned, image_format = strip_metadata(content)
+        if cleaned is not None:
+            content = cleaned
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        directory, filename = posixpath.split(name)
+        extension = EXTENSIONS.get(
+            image_format, posixpath.splitext(filename)[1].lower())
+        name = posixpath.join(
+            directory, digest[:2], f'{digest}{extension}')
+        if self.exists(name):
+            return name
+        return super()._save(name, content)
@@ -0,0 +1,41 @@
+from django import template
+
+from ..thumbnails import (DEFAULT_WIDTH, FALLBACK_FORMAT, MIME_TYPES,
+                          MODERN_FORMATS, variants)
+
+register = template.Library()
+
+# Карточка занимает всю ширину экрана на телефоне и не шире 960px.
+SIZES = '(min-width: 992px) 960px, 100vw'
+
+
+def _srcset(thumbnails):
+    return ', '.join(
+        f'{thumbnail.url} {thumbnail.width}w' for thumbnail in thumbnails
+    )
+
+
+@register.inclusion_tag('posts/includes/picture.html')
+def responsive_image(image):
+    """<picture> с AVIF/WebP и JPEG нескольких ширин.
+
+    Пока миниатюры готовятся, выводится оригинал картинки.
+    """
+    ready = variants(image)
+    if ready is None:
+        return {'image': image}
+    fallback = ready[FALLBACK_FORMAT]
+    return {
+        'image': image,
+        'sources': [
+            {'type': MIME_TYPES[image_format],
+             'srcset': _srcset(ready[image_format])}
+            for image_format in MODERN_FORMATS
+        ],
+        'fallback': min(
+            fallback,
+            key=lambda thumbnail: abs(thumbnail.width - DEFAULT_WIDTH),
+        ),
+        'srcset': _srcset(fallback),
+        'sizes': SIZES,
+    }
@@ -0,0 +1,42 @@
+from django import template
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+from yatube.settings import POST_CARD_TIMEOUT
+
+from ..cache import (POST_CARD_PREFIX, get_versions, post_card_prefixes,
+                     versioned_timeout)
+from ..thumbnails import is_ready
+
+register = template.Library()
+
+CARD_TEMPLATE = 'posts/includes/post.html'
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post, is_profile=False, group_link=False):
+    """Карточка поста из posts/includes/post.html с кэшированием HTML.
+
+    Ключ складывается из версий поста, автора и группы, поэтому их
+    правка сразу даёт новый ключ. updated_at в ключе не даёт карточке,
+    прочитанной из отстающей реплики, попасть под свежую версию.
+    """
+    versions = get_versions(post_card_prefixes(post))
+    key = '.'.join([
+        POST_CARD_PREFIX, str(post.pk), f'{is_profile:d}{group_link:d}',
+        str(post.updated_at.timestamp()), *versions,
+    ])
+    html = cache.get(key)
+    if html is None:
+        # Пока миниатюра не готова, в карточке стоит оригинал картинки,
+        # такую карточку не кэшируем.
+        cacheable = not post.image or is_ready(post.image)
+        card = context.template.engine.get_template(CARD_TEMPLATE)
+        html = card.render(context.new({
+            'post': post,
+            'is_profile': is_profile,
+            'group_link': group_link,
+        }))
+        if cacheable:
+            cache.set(key, html, versioned_timeout(POST_CARD_TIMEOUT))
+    return mark_safe(html)
@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Follow, Group, Post, TimelineEntry, User
+from ..transfer import Importer
+from ..search import search_posts
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class TransferCommandsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test-username')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        Post.objects.create(
+            author=cls.user, group=cls.group, text='Пост про котиков'
+        )
+        Post.objects.create(author=cls.user, text='Пост без группы')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def roundtrip(self, name):
+        path = os.path.join(TEMP_DIR, name)
+        call_command('export_posts', output=path, stderr=StringIO())
+        exported = list(
+            Post.objects.order_by('pk')
+            .values_list('text', 'author', 'group', 'pub_date')
+        )
+        Post.objects.all().delete()
+        out = StringIO()
+        call_command('import_posts', path, stdout=out)
+        self.assertIn('Загружено постов: 2, пропущено: 0', out.getvalue())
+        imported = list(
+            Post.objects.order_by('pk')
+            .values_list('text', 'author', 'group', 'pub_date')
+        )
+        self.assertEqual(imported, exported)
+
+    def test_ndjson_roundtrip(self):
+        """Выгрузка в NDJSON и загрузка обратно сохраняют посты."""
+        self.roundtrip('posts.ndjson')
+
+    def test_csv_roundtrip(self):
+        """Выгрузка в CSV и загрузка обратно сохраняют посты."""
+        self.roundtrip('posts.csv')
+
+    def test_import_updates_counters_and_search(self):
+        """Загруженные посты видны в счётчиках, поиске и лентах подписок."""
+        path = os.path.join(TEMP_DIR, 'import.ndjson')
+        with open(path, 'w', encoding='utf-8') as source:
+            source.write(
+                '{"text": "Импортированный попугай", '
+                '"author": "test-username", "group": "test-slug", '
+                '"pub_date": "2020-01-01T00:00:00+00:00"}\n'
+                '{"text": "Чужой пост", "author": "nobody"}\n'
+                '{"text": "Пост в неизвестной группе", '
+                '"author": "test-username", "group": "missing"}\n'
+                '{"text": "Обрезанная строка", \n'
+                '{"text": "Пост с плохой датой", '
+                '"author": "test-username", "pub_date": "вчера"}\n'
+            )
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.user)
+        out = StringIO()
+        call_command('import_posts', path, stdout=out)
+        self.assertIn('Загружено постов: 1, пропущено: 4', out.getvalue())
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=reader, post__text='Импортированный попугай').exists())
+        self.user.stats.refresh_from_db()
+        self.assertEqual(self.user.stats.posts_count, 3)
+        posts, _ = search_posts('попугай')
+        self.assertEqual([post.text for post in posts],
+                         ['Импортированный попугай'])
+        post = Post.objects.create(author=self.user, text='Новый попугай')
+        posts, _ = search_posts('попугай')
+        self.assertIn(post, posts)
+
+    def test_failed_import_still_updates_counters(self):
+        """Ошибка посреди файла не оставляет счётчики устаревшими."""
+        def rows():
+            yield {'text': 'Успел загрузиться', 'author': 'test-username'}
+            raise OSError('обрыв чтения')
+
+        with self.assertRaises(OSError):
+            Importer(batch_size=1).run(rows())
+        self.user.stats.refresh_from_db()
+        self.assertEqual(self.user.stats.posts_count, 3)
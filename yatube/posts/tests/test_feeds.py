@@ -0,0 +1,140 @@
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post, User
+from .test_views import run_on_commit
+
+
+@mock.patch('posts.cache.transaction.on_commit', run_on_commit)
+class FeedTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='test-username')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа', slug='other-slug', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Тестовый пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def feed_urls(self, kind):
+        return (
+            reverse('posts:index_feed', args=[kind]),
+            reverse('posts:group_feed', args=[self.group.slug, kind]),
+            reverse('posts:profile_feed', args=[self.user.username, kind]),
+        )
+
+    def test_feed_formats(self):
+        """Ленты отдаются в RSS, Atom и JSON Feed."""
+        content_types = {
+            'rss': 'application/rss+xml',
+            'atom': 'application/atom+xml',
+            'json': 'application/feed+json',
+        }
+        for kind, content_type in content_types.items():
+            for url in self.feed_urls(kind):
+                with self.subTest(url=url):
+                    response = self.client.get(url)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertTrue(
+                        response['Content-Type'].startswith(content_type))
+                    self.assertIn(self.post.text, response.content.decode())
+
+    def test_missing_feed(self):
+        """Неизвестный формат и несуществующая группа дают 404."""
+        urls = (
+            reverse('posts:index_feed', args=['xml']),
+            reverse('posts:group_feed', args=['missing', 'rss']),
+            reverse('posts:profile_feed', args=['missing', 'json']),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_json_feed_items(self):
+        """JSON Feed содержит посты с автором и группой."""
+        url = reverse('posts:group_feed', args=[self.group.slug, 'json'])
+        feed = self.client.get(url).json()
+        self.assertEqual(feed['title'], self.group.title)
+        item, = feed['items']
+        self.assertEqual(item['id'], str(self.post.pk))
+        self.assertEqual(item['content_text'], self.post.text)
+        self.assertEqual(item['authors'][0]['name'], self.user.username)
+        self.assertEqual(item['tags'], [self.group.title])
+
+    @mock.patch('posts.feeds.FEED_CHUNK_SIZE', 2)
+    @mock.patch('posts.feeds.FEED_ITEMS', 2)
+    def test_large_json_feed_streamed(self):
+        """Большая выгрузка отдаётся потоком и не кэшируется."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Пост {number}')
+            for number in range(5)
+        )
+        url = reverse('posts:profile_feed', args=[self.user.username, 'json'])
+        response = self.client.get(url, {'limit': 10})
+        self.assertTrue(response.streaming)
+        feed = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(feed['items']), 6)
+        response = self.client.get(url, {'limit': 10})
+        self.assertTrue(response.streaming)
+        self.assertEqual(len(self.client.get(url).json()['items']), 2)
+
+    def test_feed_cached_until_post_changed(self):
+        """Лента берётся из кэша, пока посты не изменились."""
+        url = reverse('posts:group_feed', args=[self.group.slug, 'rss'])
+        self.client.get(url)
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигналов')
+        self.assertIn(self.post.text, self.client.get(url).content.decode())
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertIn('Новый текст', self.client.get(url).content.decode())
+
+    def test_post_save_skips_author_and_group(self):
+        """Сброс лент при сохранении поста не читает автора и группу."""
+        post = Post.objects.get(pk=self.post.pk)
+        with CaptureQueriesContext(connection) as context:
+            post.save()
+        for table in ('auth_user', 'posts_group'):
+            with self.subTest(table=table):
+                self.assertFalse([
+                    query['sql'] for query in context.captured_queries
+                    if query['sql'].startswith('SELECT')
+                    and f'FROM "{table}"' in query['sql']
+                ])
+
+    def test_moved_post_leaves_group_feed(self):
+        """Пост, перенесённый в другую группу, пропадает из ленты прежней."""
+        url = reverse('posts:group_feed', args=[self.group.slug, 'json'])
+        self.assertEqual(len(self.client.get(url).json()['items']), 1)
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(self.client.get(url).json()['items'], [])
+
+    def test_not_modified(self):
+        """Повторный запрос с ETag получает 304, новый пост меняет ETag."""
+        for url in self.feed_urls('atom'):
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+        etags = {url: self.client.get(url)['ETag']
+                 for url in self.feed_urls('atom')}
+        Post.objects.create(author=self.user, group=self.group, text='Ещё')
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
@@ -1,17 +1,39 @@
+import hashlib
 import shutil
+import struct
 import tempfile
+import zlib
+from io import BytesIO
+from unittest import mock
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from ..models import Post, Group, Comment, User
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+def blank_png(width, height):
+    """Чёрно-белый PNG из нулей: большой размер при крошечном файле."""
+    def chunk(kind, data):
+        return (struct.pack('>I', len(data)) + kind + data
+                + struct.pack('>I', zlib.crc32(kind + data)))
+    row = bytes(1 + (width + 7) // 8)
+    compressor = zlib.compressobj(9)
+    pixels = b''.join(compressor.compress(row) for _ in range(height))
+    return b''.join([
+        b'\x89PNG\r\n\x1a\n',
+        chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 1, 0, 0, 0, 0)),
+        chunk(b'IDAT', pixels + compressor.flush()),
+        chunk(b'IEND', b''),
+    ])
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
 class PostFormTest(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -50,6 +72,8 @@ class PostFormTest(TestCase):
             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
             b'\x0A\x00\x3B'
         )
+        digest = hashlib.sha256(cls.small_gif).hexdigest()
+        cls.small_gif_name = f'posts/{digest[:2]}/{digest}.gif'
 
     @classmethod
     def tearDownClass(cls):
@@ -109,7 +133,7 @@ class PostFormTest(TestCase):
         self.assertEqual(post.id, Post.objects.first().id)
         self.assertEqual(post.text, form_data['text'])
         self.assertEqual(post.group, self.group)
-        self.assertEqual(post.image, 'posts/small.gif')
+        self.assertEqual(post.image, self.small_gif_name)
 
     def test_edit_post(self):
         """Валидная форма редактирует запись в в БД."""
@@ -137,7 +161,40 @@ class PostFormTest(TestCase):
         self.assertEqual(Post.objects.count(), posts_count)
         self.assertEqual(post.text, form_data['text'])
         self.assertEqual(post.group.pk, form_data['group'])
-        self.assertEqual(post.image, 'posts/small_edit.gif')
+        self.assertEqual(post.image, self.small_gif_name)
+
+    def post_image(self, name, content):
+        response = self.authorized_client.post(self.post_create_url, {
+            'text': 'Пост с картинкой',
+            'image': SimpleUploadedFile(name, content),
+        })
+        return response.context['form'].errors.as_data().get('image', [])
+
+    def test_image_checked_before_decoding(self):
+        """Огромная картинка и чужой формат отклоняются без декодирования."""
+        bmp = BytesIO()
+        Image.new('RGB', (1, 1)).save(bmp, 'BMP')
+        cases = (
+            ('large.png', blank_png(8000, 8000), 'too_many_pixels'),
+            # Больше вдвое Image.MAX_IMAGE_PIXELS: Pillow сам не открывает.
+            ('bomb.png', blank_png(20000, 20000), 'invalid_image'),
+            ('image.bmp', bmp.getvalue(), 'unsupported_format'),
+            ('broken.gif', self.small_gif[:10], 'invalid_image'),
+        )
+        posts_count = Post.objects.count()
+        for name, content, code in cases:
+            with self.subTest(name=name), \
+                    mock.patch('PIL.Image.Image.load') as load:
+                errors = self.post_image(name, content)
+                self.assertEqual([error.code for error in errors], [code])
+                load.assert_not_called()
+        self.assertEqual(Post.objects.count(), posts_count)
+
+    def test_upload_size_limited(self):
+        """Файл больше UPLOAD_MAX_SIZE не сохраняется."""
+        with mock.patch('core.uploads.UPLOAD_MAX_SIZE', 10):
+            errors = self.post_image('small.gif', self.small_gif)
+        self.assertEqual([error.code for error in errors], ['too_large'])
 
     def test_authorized_user_can_comment(self):
         """Авторизованный пользователь может комментировать посты."""
@@ -1,7 +1,10 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 from django.conf import settings
 
-from ..models import Group, Post, User
+from ..models import AuthorStats, Comment, Follow, Group, Post, User
 
 
 class PostModelTest(TestCase):
@@ -57,3 +60,56 @@ class PostModelTest(TestCase):
             with self.subTest(value=value):
                 self.assertEqual(
                     post._meta.get_field(value).help_text, expected)
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def test_counters_follow_changes(self):
+        """Счётчики меняются при создании и удалении объектов."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий'
+        )
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.author).posts_count, 1
+        )
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.author).followers_count, 1
+        )
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.reader).following_count, 1
+        )
+        comment.delete()
+        follow.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        post.delete()
+        stats = AuthorStats.objects.get(user=self.author)
+        self.assertEqual(
+            (stats.posts_count, stats.followers_count), (0, 0)
+        )
+
+    def test_reconcile_counters_command(self):
+        """reconcile_counters исправляет рассинхронизацию счётчиков."""
+        Post.objects.bulk_create(
+            [Post(author=self.author, text='Пост') for _ in range(3)]
+        )
+        AuthorStats.objects.filter(user=self.reader).delete()
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'Исправлено строк: 1')
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.author).posts_count, 3
+        )
+        self.assertTrue(AuthorStats.objects.filter(user=self.reader).exists())
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'Исправлено строк: 0')
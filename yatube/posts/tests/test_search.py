@@ -0,0 +1,97 @@
+from unittest import mock
+
+from django.conf import settings
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.search_url = reverse('posts:search')
+        cls.user = User.objects.create_user(username='test-username')
+        cls.group = Group.objects.create(
+            title='Котики',
+            slug='cats',
+            description='Группа о домашних животных',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            group=cls.group,
+            text='Котик спит на диване',
+        )
+        Post.objects.bulk_create(
+            [
+                Post(author=cls.user, text=f'Собака номер {num} и котик')
+                for num in range(settings.POSTS_PER_PAGE + 2)
+            ]
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_search_posts_and_groups(self):
+        """Поиск находит посты по префиксу слова и группы по названию."""
+        response = self.guest_client.get(self.search_url, {'q': 'ДИВАН'})
+        self.assertTemplateUsed(response, 'posts/search.html')
+        self.assertEqual(response.context['posts'], [self.post])
+        response = self.guest_client.get(self.search_url, {'q': 'котик'})
+        self.assertEqual(response.context['groups'], [self.group])
+        response = self.guest_client.get(self.search_url, {'q': '"*'})
+        self.assertEqual(response.context['posts'], [])
+
+    def test_search_index_follows_changes(self):
+        """Правка и удаление поста сразу видны в поиске."""
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Попугай сидит на жёрдочке'
+        post.save()
+        response = self.guest_client.get(self.search_url, {'q': 'попугай'})
+        self.assertEqual(response.context['posts'], [post])
+        response = self.guest_client.get(self.search_url, {'q': 'диван'})
+        self.assertEqual(response.context['posts'], [])
+        post.delete()
+        response = self.guest_client.get(self.search_url, {'q': 'попугай'})
+        self.assertEqual(response.context['posts'], [])
+
+    def test_search_cursor(self):
+        """Курсор поиска обходит все результаты без повторов."""
+        response = self.guest_client.get(self.search_url, {'q': 'собака'})
+        posts = response.context['posts']
+        self.assertEqual(len(posts), settings.POSTS_PER_PAGE)
+        response = self.guest_client.get(
+            self.search_url,
+            {'q': 'собака', 'cursor': response.context['next_cursor']},
+        )
+        posts += response.context['posts']
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertEqual(len(set(posts)), settings.POSTS_PER_PAGE + 2)
+
+    def walk(self, text):
+        """Все страницы поиска по курсорам."""
+        posts = []
+        params = {'q': text}
+        while True:
+            response = self.guest_client.get(self.search_url, params)
+            posts += response.context['posts']
+            if not response.context['next_cursor']:
+                return posts
+            params['cursor'] = response.context['next_cursor']
+
+    @mock.patch('posts.search.SEARCH_CANDIDATES', 3)
+    def test_search_beyond_candidates(self):
+        """Совпадения сверх SEARCH_CANDIDATES доступны по курсору."""
+        posts = self.walk('котик')
+        self.assertEqual(len(posts), settings.POSTS_PER_PAGE + 3)
+        self.assertEqual(len(set(posts)), len(posts))
+
+    def test_search_fallback_cursor(self):
+        """Поиск без FTS5 тоже листается курсором."""
+        with mock.patch('posts.search.connection') as connection:
+            connection.vendor = 'postgresql'
+            posts = self.walk('номер')
+        self.assertEqual(len(posts), settings.POSTS_PER_PAGE + 2)
+        self.assertEqual(len(set(posts)), len(posts))
+        self.assertEqual(posts, sorted(posts, key=lambda post: -post.pk))
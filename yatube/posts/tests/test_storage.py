@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from ..storage import ContentAddressedStorage
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+ORIENTATION = 0x0112
+
+
+def make_jpeg(orientation=None, size=(4, 2)):
+    image = Image.new('RGB', size, (200, 30, 30))
+    exif = Image.Exif()
+    exif[0x010F] = 'Camera'
+    if orientation:
+        exif[ORIENTATION] = orientation
+    output = BytesIO()
+    image.save(output, 'JPEG', exif=exif.tobytes())
+    return output.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.storage = ContentAddressedStorage()
+
+    def open(self, name):
+        with self.storage.open(name) as file:
+            return Image.open(BytesIO(file.read()))
+
+    def test_name_is_content_hash(self):
+        """Имя файла — хеш содержимого с расширением по формату."""
+        name = self.storage.save('posts/photo.JPEG', ContentFile(make_jpeg()))
+        directory, filename = os.path.split(name)
+        digest, extension = os.path.splitext(filename)
+        self.assertEqual(directory, f'posts/{digest[:2]}')
+        self.assertEqual(len(digest), 64)
+        self.assertEqual(extension, '.jpg')
+
+    def test_duplicates_share_file(self):
+        """Повторная загрузка той же картинки не создаёт новый файл."""
+        first = self.storage.save('posts/a.jpg', ContentFile(make_jpeg()))
+        second = self.storage.save('posts/b.jpg', ContentFile(make_jpeg()))
+        self.assertEqual(first, second)
+        self.assertEqual(
+            os.listdir(os.path.dirname(self.storage.path(first))),
+            [os.path.basename(first)],
+        )
+
+    def test_metadata_stripped(self):
+        """EXIF удаляется, поворот из него применяется к пикселям."""
+        name = self.storage.save(
+            'posts/rotated.jpg', ContentFile(make_jpeg(orientation=6)))
+        image = self.open(name)
+        self.assertFalse(image.getexif())
+        self.assertEqual(image.size, (2, 4))
+
+    def test_unknown_content_kept(self):
+        """Не-картинка сохраняется как есть."""
+        name = self.storage.save('posts/notes.txt', ContentFile(b'text'))
+        self.assertTrue(name.endswith('.txt'))
+        with self.storage.open(name) as file:
+            self.assertEqual(file.read(), b'text')
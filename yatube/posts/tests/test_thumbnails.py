@@ -0,0 +1,108 @@
+import os
+import re
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+
+from ..models import Post, User
+from ..thumbnails import (MIME_TYPES, MODERN_FORMATS, THUMBNAIL_GEOMETRIES,
+                          DeferredThumbnailBackend)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+THUMBNAIL_TAG = re.compile(
+    r'{%\s*thumbnail\s+\S+\s+"([^"]+)"([^%]*?)(?:as\s+\w+\s*)?%}'
+)
+THUMBNAIL_OPTION = re.compile(r'(\w+)=("[^"]*"|\S+)')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test-username')
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='small.gif', content=small_gif,
+                content_type='image/gif'
+            ),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        # Одинаковые картинки делят файл, а значит и миниатюры: каждый
+        # тест начинает без готовых.
+        cache.clear()
+        shutil.rmtree(
+            os.path.join(TEMP_MEDIA_ROOT, 'cache'), ignore_errors=True)
+
+    def test_templates_geometries_are_pregenerated(self):
+        """Все размеры {% thumbnail %} из шаблонов готовятся заранее."""
+        for root, _, files in os.walk(settings.TEMPLATES_DIR):
+            for name in files:
+                with open(os.path.join(root, name)) as template:
+                    content = template.read()
+                for geometry, raw_options in THUMBNAIL_TAG.findall(content):
+                    options = {
+                        key: value.strip('"') if value.startswith('"')
+                        else value == 'True'
+                        for key, value
+                        in THUMBNAIL_OPTION.findall(raw_options)
+                    }
+                    with self.subTest(template=name, geometry=geometry):
+                        self.assertIn(
+                            (geometry, options), THUMBNAIL_GEOMETRIES
+                        )
+
+    def test_render_does_not_generate_thumbnail(self):
+        """Без готовой миниатюры отдаётся оригинал, генерация в очереди."""
+        backend = DeferredThumbnailBackend()
+        geometry, options = THUMBNAIL_GEOMETRIES[0]
+        with mock.patch('posts.thumbnails.schedule') as schedule, \
+                mock.patch('sorl.thumbnail.default.engine') as engine:
+            image = backend.get_thumbnail(
+                self.post.image, geometry, **options)
+        schedule.assert_called_once()
+        engine.get_image.assert_not_called()
+        self.assertEqual(image.name, self.post.image.name)
+        backend.generate(self.post.image, geometry, options)
+        thumbnail = backend.get_thumbnail(
+            self.post.image, geometry, **options)
+        self.assertNotEqual(thumbnail.name, self.post.image.name)
+        self.assertTrue(thumbnail.exists())
+
+    def test_responsive_image(self):
+        """Готовые миниатюры выводятся в <picture> с srcset по форматам."""
+        template = Template(
+            '{% load pictures %}{% responsive_image post.image %}')
+        context = Context({'post': self.post})
+        self.assertIn(
+            f'src="{self.post.image.url}"', template.render(context))
+        html = template.render(context)
+        self.assertIn('<picture>', html)
+        self.assertNotIn(f'src="{self.post.image.url}"', html)
+        self.assertRegex(html, r'<img [^>]*srcset="\S+\.jpg 2w"')
+        for image_format in MODERN_FORMATS:
+            with self.subTest(image_format=image_format):
+                self.assertIn(
+                    f'<source type="{MIME_TYPES[image_format]}"', html)
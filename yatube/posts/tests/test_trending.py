@@ -0,0 +1,104 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from yatube.settings import TRENDING_GENERATIONS, TRENDING_HALF_LIFE
+
+from .. import trending
+from ..models import Comment, Group, Post, PostTrend, User
+
+HALF_LIFE = timedelta(seconds=TRENDING_HALF_LIFE)
+
+
+class TrendingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='test-username')
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {number}', slug=f'slug-{number}',
+                description='Описание')
+            for number in range(2)
+        ]
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user, group=cls.groups[0], text=f'Пост {number}')
+            for number in range(3)
+        ]
+        Post.objects.create(
+            author=cls.user, group=cls.groups[1], text='Ещё пост')
+
+    def comment(self, post, count=1):
+        for _ in range(count):
+            Comment.objects.create(post=post, author=self.user, text='Ок')
+
+    def later(self, delta):
+        return mock.patch(
+            'posts.trending.timezone.now',
+            return_value=timezone.now() + delta,
+        )
+
+    def test_ranking(self):
+        """Посты идут по числу свежих комментариев, группы — по постам."""
+        self.comment(self.posts[1], 3)
+        self.comment(self.posts[2], 1)
+        self.assertEqual(
+            trending.top_posts(10), [self.posts[1], self.posts[2]])
+        self.assertEqual(trending.top_groups(10), self.groups)
+
+    def test_recent_comments_outweigh_old(self):
+        """Старые комментарии весят меньше свежих."""
+        self.comment(self.posts[0], 3)
+        with self.later(HALF_LIFE * 2):
+            trending.comment_added(mock.Mock(
+                post_id=self.posts[1].pk, pub_date=trending.timezone.now(),
+            ))
+            self.assertEqual(
+                trending.top_posts(2), [self.posts[1], self.posts[0]])
+
+    def test_compaction(self):
+        """Компактизация не меняет порядок и удаляет затухшие строки."""
+        self.comment(self.posts[0], 2)
+        self.comment(self.posts[1], 1)
+        with self.later(HALF_LIFE):
+            before = trending.top_posts(10)
+            call_command('compact_trending', stdout=StringIO())
+            self.assertEqual(trending.top_posts(10), before)
+            self.assertEqual(
+                set(PostTrend.objects.values_list('generation', flat=True)),
+                {trending._generation(trending.timezone.now())},
+            )
+        with self.later(HALF_LIFE * TRENDING_GENERATIONS):
+            self.assertEqual(trending.top_posts(10), [])
+            trending.compact()
+        self.assertFalse(PostTrend.objects.exists())
+
+    def test_rebuild_matches_incremental(self):
+        """Пересчёт из БД даёт те же счета, что и события."""
+        self.comment(self.posts[0], 2)
+        self.comment(self.posts[1], 1)
+        incremental = dict(PostTrend.objects.values_list('pk', 'score'))
+        call_command('compact_trending', '--rebuild', stdout=StringIO())
+        rebuilt = dict(PostTrend.objects.values_list('pk', 'score'))
+        self.assertEqual(incremental.keys(), rebuilt.keys())
+        for pk, score in incremental.items():
+            self.assertAlmostEqual(rebuilt[pk], score)
+
+    def test_page_skips_comments_table(self):
+        """Страница популярного не читает таблицу комментариев."""
+        self.comment(self.posts[0])
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('posts:trending'))
+        self.assertTemplateUsed(response, 'posts/trending.html')
+        self.assertEqual(list(response.context['posts']), self.posts[:1])
+        self.assertFalse([
+            query for query in context.captured_queries
+            if 'posts_comment' in query['sql']
+        ])
@@ -1,20 +1,37 @@
 import shutil
 import tempfile
+from unittest import mock
 
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.db import connection, transaction
+from django.test import (Client, RequestFactory, TestCase,
+                         TransactionTestCase, override_settings)
+from django.template import Context, Template
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.cache import get_cache_key
 from django import forms
 
-from ..models import Group, Post, Follow, User
+from ..cache import (INDEX_PAGE_PREFIX, POST_CARD_PREFIX, get_version,
+                     versioned_timeout)
+from ..follows import (follow_authors, get_following, is_following,
+                       unfollow_authors)
+from ..timeline import push_posts
+from ..models import (AuthorStats, Comment, Group, Post, Follow,
+                      TimelineEntry, User)
 from ..forms import PostForm
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+def run_on_commit(func, using=None):
+    """TestCase не выполняет on_commit, колбэк вызывается сразу."""
+    func()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
 class PostPagesTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -194,21 +211,102 @@ class PostPagesTests(TestCase):
         for url, posts_count in urls.items():
             self._page_paginator(url, posts_count)
 
+    def test_cursor_paginator(self):
+        """Курсоры обходят все посты без повторов в обе стороны."""
+        response = self.authorized_client.get(self.index_url)
+        seen = list(response.context['page_obj'])
+        paginator = response.context['page_obj'].paginator
+        self.assertIsNone(paginator.previous_cursor)
+        response = self.authorized_client.get(
+            self.index_url, {'cursor': paginator.next_cursor}
+        )
+        seen += list(response.context['page_obj'])
+        paginator = response.context['page_obj'].paginator
+        self.assertIsNone(paginator.next_cursor)
+        self.assertEqual(len(seen), self.posts_quantity)
+        self.assertEqual(len(set(seen)), self.posts_quantity)
+        self.assertEqual(seen[-1], self.post)
+        response = self.authorized_client.get(
+            self.index_url, {'cursor': paginator.previous_cursor}
+        )
+        self.assertEqual(
+            list(response.context['page_obj']),
+            seen[:settings.POSTS_PER_PAGE]
+        )
+
+    def test_cursor_paginator_last_and_broken_cursor(self):
+        """Курсор последней страницы и битый курсор обрабатываются."""
+        response = self.authorized_client.get(self.index_url)
+        paginator = response.context['page_obj'].paginator
+        response = self.authorized_client.get(
+            self.index_url, {'cursor': paginator.last_cursor}
+        )
+        self.assertEqual(response.context['page_obj'][-1], self.post)
+        self.assertIsNone(response.context['page_obj'].paginator.next_cursor)
+        response = self.authorized_client.get(
+            self.index_url, {'cursor': 'broken'}
+        )
+        self.assertEqual(
+            len(response.context['page_obj']), settings.POSTS_PER_PAGE
+        )
+
+    @mock.patch('posts.cache.transaction.on_commit', run_on_commit)
     def test_cache_index(self):
-        """Проверка хранения и очищения кэша для index_url."""
+        """Кэш index хранится до изменения постов и сбрасывается сигналом."""
         response = self.authorized_client.get(self.index_url)
         posts = response.content
-        Post.objects.create(
-            text='test_new_post',
-            author=self.user,
+        Post.objects.filter(pk=self.another_post.pk).update(
+            text='changed_without_signal'
         )
         response_old = self.authorized_client.get(self.index_url)
         old_posts = response_old.content
         self.assertEqual(old_posts, posts)
-        cache.clear()
+        Post.objects.create(
+            text='test_new_post',
+            author=self.user,
+        )
         response_new = self.authorized_client.get(self.index_url)
         new_posts = response_new.content
         self.assertNotEqual(old_posts, new_posts)
+        self.assertIn('test_new_post', new_posts.decode())
+
+    def test_cache_timeout_on_per_process_cache(self):
+        """С LocMemCache страницы кэшируются ненадолго."""
+        shared = {'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': tempfile.mkdtemp(dir=TEMP_MEDIA_ROOT),
+        }}
+        with mock.patch('posts.cache.cache.set') as cache_set:
+            self.authorized_client.get(self.index_url)
+        self.assertEqual(
+            cache_set.call_args[0][2], settings.LOCAL_CACHE_TIMEOUT
+        )
+        with override_settings(CACHES=shared):
+            self.assertEqual(
+                versioned_timeout(settings.PAGE_CACHE_TIMEOUT),
+                settings.PAGE_CACHE_TIMEOUT,
+            )
+
+    @mock.patch('posts.cache.transaction.on_commit', run_on_commit)
+    def test_cache_index_serves_stale_while_rebuilding(self):
+        """Пока страницу пересобирает другой запрос, отдаётся старая."""
+        response = self.authorized_client.get(self.index_url)
+        posts = response.content
+        Post.objects.create(
+            text='test_new_post',
+            author=self.user,
+        )
+        request = RequestFactory().get(self.index_url)
+        request.user = self.user
+        cache_key = get_cache_key(
+            request, f'{INDEX_PAGE_PREFIX}.{self.user.pk}'
+        )
+        cache.set(f'{cache_key}.lock', True)
+        response_stale = self.authorized_client.get(self.index_url)
+        self.assertEqual(response_stale.content, posts)
+        cache.delete(f'{cache_key}.lock')
+        response_new = self.authorized_client.get(self.index_url)
+        self.assertIn('test_new_post', response_new.content.decode())
 
     def test_follow(self):
         """Тестирование подписки на автора."""
@@ -266,3 +364,467 @@ class PostPagesTests(TestCase):
         response_unfollow = authorized_client.get(self.follow_index)
         context_unfollow = response_unfollow.context
         self.assertEqual(len(context_unfollow['page_obj']), 0)
+
+    def _follow_feed(self, client, **params):
+        """Метод для обхода всей ленты подписок по курсорам."""
+        posts = []
+        response = client.get(self.follow_index, params)
+        posts += list(response.context['page_obj'])
+        next_cursor = response.context['page_obj'].paginator.next_cursor
+        while next_cursor:
+            response = client.get(self.follow_index, {'cursor': next_cursor})
+            posts += list(response.context['page_obj'])
+            next_cursor = response.context['page_obj'].paginator.next_cursor
+        return posts
+
+    def test_follow_timeline_new_posts(self):
+        """Новые посты, в том числе массовые, появляются в ленте."""
+        Follow.objects.create(user=self.another_user, author=self.user)
+        self._follow_feed(self.another_authorized_client)
+        last_id = Post.objects.latest('id').pk
+        Post.objects.bulk_create(
+            [Post(author=self.user, text='Пост в обход сигналов')]
+        )
+        push_posts(last_id)
+        new_post = Post.objects.create(author=self.user, text='Новый пост')
+        posts = self._follow_feed(self.another_authorized_client)
+        self.assertEqual(posts[0], new_post)
+        self.assertEqual(posts[1].text, 'Пост в обход сигналов')
+        self.assertEqual(len(posts), self.posts_num_test_user + 2)
+        self.assertEqual(posts[-1], self.post)
+
+    @mock.patch('posts.timeline.transaction.on_commit', run_on_commit)
+    def test_follow_timeline_fan_out_on_read(self):
+        """Посты авторов с множеством подписчиков подмешиваются при чтении."""
+        Follow.objects.create(user=self.another_user, author=self.user)
+        with mock.patch('posts.timeline.TIMELINE_FANOUT_LIMIT', 0):
+            self._follow_feed(self.another_authorized_client)
+            new_post = Post.objects.create(
+                author=self.user, text='Новый пост'
+            )
+            posts = self._follow_feed(self.another_authorized_client)
+        self.assertFalse(
+            TimelineEntry.objects.filter(post=new_post).exists())
+        self.assertEqual(posts[0], new_post)
+        self.assertEqual(len(posts), len(set(posts)))
+        self.assertEqual(len(posts), self.posts_num_test_user + 1)
+
+    def test_follow_timeline_reads_entries(self):
+        """Лента читается из TimelineEntry без выборки по всем авторам."""
+        Follow.objects.create(user=self.another_user, author=self.user)
+        with CaptureQueriesContext(connection) as context:
+            posts = self._follow_feed(self.another_authorized_client)
+        self.assertEqual(len(posts), self.posts_num_test_user)
+        self.assertFalse([
+            query['sql'] for query in context.captured_queries
+            if '"posts_post"."author_id" IN' in query['sql']
+        ])
+        response = self.another_authorized_client.get(
+            self.follow_index, {'page': 2}
+        )
+        self._first_created_post_check(response)
+        Follow.objects.filter(user=self.another_user).delete()
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.another_user).exists())
+
+    def test_post_detail_comments_fixed_queries(self):
+        """Число запросов post_detail не зависит от числа комментариев."""
+        Comment.objects.create(
+            post=self.post, author=self.another_user, text='Первый'
+        )
+        self.authorized_client.get(self.post_detail_url)
+        with CaptureQueriesContext(connection) as few_comments:
+            self.authorized_client.get(self.post_detail_url)
+        Comment.objects.bulk_create(
+            [
+                Comment(post=self.post, author=self.another_user,
+                        text=f'Комментарий {num}')
+                for num in range(settings.COMMENTS_PER_PAGE * 2)
+            ]
+        )
+        with CaptureQueriesContext(connection) as many_comments:
+            response = self.authorized_client.get(self.post_detail_url)
+        self.assertEqual(len(many_comments), len(few_comments))
+        comments = response.context['comments']
+        self.assertEqual(len(comments), settings.COMMENTS_PER_PAGE)
+        response = self.authorized_client.get(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk}),
+            {'cursor': comments.paginator.next_cursor},
+        )
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertEqual(
+            len(response.context['comments']), settings.COMMENTS_PER_PAGE
+        )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='test-username', first_name='Иван'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Тестовый пост'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.card = Template(
+            '{% load post_cards %}{% post_card post group_link=True %}'
+        )
+
+    def render(self):
+        post = Post.objects.select_related('author', 'group').get(
+            pk=self.post.pk
+        )
+        return self.card.render(Context({'post': post}))
+
+    def render_cached(self):
+        """Рендер, который падает, если карточки нет в кэше."""
+        with mock.patch(
+            'posts.templatetags.post_cards.CARD_TEMPLATE', 'missing.html'
+        ):
+            return self.render()
+
+    def test_post_card_cached(self):
+        """Повторный рендер карточки берёт HTML из кэша."""
+        html = self.render()
+        self.assertIn('Тестовый пост', html)
+        self.assertIn(self.group.get_absolute_url(), html)
+        self.assertEqual(self.render_cached(), html)
+
+    @mock.patch('posts.cache.transaction.on_commit', run_on_commit)
+    def test_post_card_invalidated(self):
+        """Правка поста, автора или группы меняет карточку."""
+        self.render()
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
+        self.assertIn('Тестовый пост', self.render())
+        Post.objects.get(pk=self.post.pk).save()
+        self.assertIn('Тихая правка', self.render())
+        self.user.first_name = 'Пётр'
+        self.user.save()
+        self.assertIn('Пётр', self.render())
+        self.group.slug = 'new-slug'
+        self.group.save()
+        self.assertIn('/group/new-slug/', self.render())
+
+    def test_post_card_with_pending_thumbnail_not_cached(self):
+        """Карточка с оригиналом вместо миниатюры не попадает в кэш."""
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        post = Post.objects.get(pk=self.post.pk)
+        post.image = SimpleUploadedFile(
+            name='card.gif', content=small_gif, content_type='image/gif'
+        )
+        post.save()
+        self.assertIn(f'src="{post.image.url}"', self.render())
+        html = self.render()
+        self.assertNotIn(f'src="{post.image.url}"', html)
+        self.render()
+        self.assertEqual(self.render_cached(), html)
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='test-username')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Тестовый пост'
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user.username}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def assertNotModified(self, url, response, client=None):
+        client = client or self.client
+        repeat = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat.templates, [])
+        repeat = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(repeat.status_code, 304)
+
+    def assertModified(self, url, response, client=None):
+        client = client or self.client
+        repeat = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repeat.status_code, 200)
+
+    def test_not_modified_without_render(self):
+        """Повторный запрос с ETag или Last-Modified получает 304."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertNotModified(url, self.client.get(url))
+
+    def test_modified_after_changes(self):
+        """Правки поста, комментарии и удаления меняют ETag."""
+        responses = {url: self.client.get(url) for url in self.urls}
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        for url, response in responses.items():
+            with self.subTest(url=url):
+                self.assertModified(url, response)
+        detail_url = self.urls[3]
+        response = self.client.get(detail_url)
+        Comment.objects.create(post=post, author=self.reader, text='Текст')
+        self.assertModified(detail_url, response)
+        response = self.client.get(self.urls[0])
+        Post.objects.create(author=self.reader, text='Лишний пост').delete()
+        self.assertModified(self.urls[0], response)
+
+    def test_etag_from_database(self):
+        """ETag не зависит от кэша, удаления и правки авторов меняют его."""
+        old_post = Post.objects.create(author=self.reader, text='Старый')
+        Post.objects.get(pk=self.post.pk).save()
+        url = self.urls[0]
+        response = self.client.get(url)
+        cache.clear()
+        self.assertNotModified(url, response)
+        old_post.delete()
+        self.assertModified(url, response)
+        response = self.client.get(url)
+        self.user.first_name = 'Пётр'
+        self.user.save()
+        self.assertModified(url, response)
+
+    def test_post_detail_etag_skips_comments(self):
+        """Проверка ETag поста не читает таблицу комментариев."""
+        url = self.urls[3]
+        response = self.client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            self.assertNotModified(url, response)
+        self.assertFalse([
+            query['sql'] for query in context.captured_queries
+            if 'FROM "posts_comment"' in query['sql']
+        ])
+
+    def test_etag_depends_on_user(self):
+        """Разные пользователи и подписки дают разные ETag."""
+        profile_url = self.urls[2]
+        response = self.client.get(profile_url)
+        reader_client = Client()
+        reader_client.force_login(self.reader)
+        self.assertModified(profile_url, response, reader_client)
+        response = reader_client.get(profile_url)
+        Follow.objects.create(user=self.reader, author=self.user)
+        self.assertModified(profile_url, response, reader_client)
+
+    def test_missing_page_not_found(self):
+        """Для несуществующих страниц по-прежнему отдаётся 404."""
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': 'missing'}),
+            HTTP_IF_NONE_MATCH='*',
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+@mock.patch('posts.follows.transaction.on_commit', run_on_commit)
+class FollowingCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author-{number}')
+            for number in range(3)
+        ]
+        for author in cls.authors:
+            Post.objects.create(author=author, text=f'Пост {author}')
+        Follow.objects.create(user=cls.user, author=cls.authors[0])
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def follow_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.authorized_client.get(url)
+        return response, [
+            query['sql'] for query in context.captured_queries
+            if 'posts_follow' in query['sql']
+        ]
+
+    def test_following_set_updated(self):
+        """Подписка и отписка меняют закэшированный набор авторов."""
+        ids = [author.pk for author in self.authors]
+        self.assertEqual(list(get_following(self.user.pk)), ids[:1])
+        Follow.objects.create(user=self.user, author=self.authors[2])
+        Follow.objects.create(user=self.user, author=self.authors[1])
+        self.assertEqual(list(get_following(self.user.pk)), ids)
+        Follow.objects.filter(user=self.user, author=self.authors[0]).delete()
+        self.assertEqual(list(get_following(self.user.pk)), ids[1:])
+        self.assertFalse(is_following(self.user.pk, self.authors[0].pk))
+        self.assertTrue(is_following(self.user.pk, self.authors[1].pk))
+
+    def test_cold_following_set_not_pinned(self):
+        """Сборка набора подписок не закрепляет запрос за основной базой."""
+        response = self.authorized_client.get(reverse(
+            'posts:profile', kwargs={'username': self.authors[0].username}))
+        self.assertTrue(response.context['following'])
+        self.assertNotIn(settings.PRIMARY_PIN_COOKIE, response.cookies)
+
+    def test_pages_skip_follow_table(self):
+        """Профиль и лента подписок не читают Follow, когда набор в кэше."""
+        get_following(self.user.pk)
+        for author, following in ((self.authors[0], True),
+                                  (self.authors[1], False)):
+            with self.subTest(author=author):
+                response, queries = self.follow_queries(reverse(
+                    'posts:profile', kwargs={'username': author.username}))
+                self.assertEqual(queries, [])
+                self.assertEqual(response.context['following'], following)
+        response, queries = self.follow_queries(
+            reverse('posts:follow_index'))
+        self.assertEqual(queries, [])
+        self.assertEqual(
+            [post.author for post in response.context['page_obj']],
+            self.authors[:1],
+        )
+
+
+class FollowingRollbackTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='author')
+
+    def test_rolled_back_follow_not_cached(self):
+        """Откаченная подписка не попадает в закэшированный набор."""
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                Follow.objects.create(user=self.user, author=self.author)
+                self.assertEqual(
+                    list(get_following(self.user.pk)), [self.author.pk])
+                raise RuntimeError
+        self.assertEqual(list(get_following(self.user.pk)), [])
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(
+            list(get_following(self.user.pk)), [self.author.pk])
+
+
+class CacheVersionCommitTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+
+    def test_version_changed_after_commit(self):
+        """Версия главной меняется только после коммита поста."""
+        version = get_version(INDEX_PAGE_PREFIX)
+        with transaction.atomic():
+            Post.objects.create(author=self.user, text='Новый пост')
+            self.assertEqual(get_version(INDEX_PAGE_PREFIX), version)
+        self.assertNotEqual(get_version(INDEX_PAGE_PREFIX), version)
+
+    def test_post_card_version_changed_after_commit(self):
+        """Карточки автора сбрасываются только после коммита правки."""
+        prefix = f'{POST_CARD_PREFIX}.user.{self.user.pk}'
+        version = get_version(prefix)
+        with transaction.atomic():
+            self.user.first_name = 'Пётр'
+            self.user.save()
+            self.assertEqual(get_version(prefix), version)
+        self.assertNotEqual(get_version(prefix), version)
+
+
+@mock.patch('posts.follows.transaction.on_commit', run_on_commit)
+class FollowServiceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author-{number}')
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def assertCounters(self):
+        for user in (self.user, *self.authors):
+            stats = AuthorStats.objects.get(user=user)
+            self.assertEqual(
+                (stats.followers_count, stats.following_count),
+                (Follow.objects.filter(author=user).count(),
+                 Follow.objects.filter(user=user).count()),
+            )
+
+    def test_repeated_follow(self):
+        """Повторная подписка пропускается одним INSERT без ошибки."""
+        author = self.authors[0]
+        self.assertEqual(follow_authors(self.user, [author.pk]), 1)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(follow_authors(self.user, [author.pk]), 0)
+        follow_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'posts_follow' in query['sql']
+        ]
+        self.assertEqual(len(follow_queries), 1)
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 1)
+        self.assertCounters()
+
+    def test_partial_overlap(self):
+        """Пакет с уже существующими подписками даёт верные счётчики."""
+        follow_authors(self.user, [self.authors[0].pk])
+        pks = [author.pk for author in self.authors]
+        self.assertEqual(follow_authors(self.user, [*pks, self.user.pk]), 2)
+        self.assertCounters()
+        self.assertEqual(list(get_following(self.user.pk)), pks)
+        self.assertEqual(unfollow_authors(self.user, pks[1:]), 2)
+        self.assertCounters()
+        self.assertEqual(list(get_following(self.user.pk)), pks[:1])
+
+    def test_batch_endpoints(self):
+        """Пакетная подписка и отписка по списку username."""
+        names = [author.username for author in self.authors]
+        response = self.authorized_client.post(
+            reverse('posts:follow_batch'), {'author': [*names, 'missing']})
+        self.assertEqual(
+            response.json(), {'changed': 3, 'not_found': ['missing']})
+        self.assertCounters()
+        response = self.authorized_client.post(
+            reverse('posts:unfollow_batch'), {'author': names[:2]})
+        self.assertEqual(response.json()['changed'], 2)
+        self.assertEqual(
+            list(Follow.objects.filter(user=self.user).values_list(
+                'author__username', flat=True)),
+            names[2:],
+        )
+        self.assertCounters()
+
+    @mock.patch('posts.views.FOLLOW_BATCH_LIMIT', 2)
+    def test_batch_limit(self):
+        """Слишком большой пакет и GET отклоняются."""
+        names = [author.username for author in self.authors]
+        url = reverse('posts:follow_batch')
+        response = self.authorized_client.post(url, {'author': names})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(self.authorized_client.get(url).status_code, 405)
@@ -0,0 +1,193 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from django.conf import settings
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.base import EXTENSIONS, ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+try:
+    # Необязательный плагин, добавляет в Pillow кодек AVIF.
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+logger = logging.getLogger(__name__)
+
+Image.init()
+# Современные форматы в порядке предпочтения; в сборке Pillow без
+# нужного кодека формат просто не предлагается браузеру.
+MODERN_FORMATS = tuple(
+    image_format for image_format in ('AVIF', 'WEBP')
+    if image_format in Image.SAVE
+)
+FALLBACK_FORMAT = 'JPEG'
+MIME_TYPES = {
+    'AVIF': 'image/avif', 'WEBP': 'image/webp', 'JPEG': 'image/jpeg',
+}
+EXTENSIONS.setdefault('AVIF', 'avif')
+
+# Ширины для srcset; высота — по пропорциям карточки 960x339.
+RESPONSIVE_WIDTHS = (480, 960, 1440)
+DEFAULT_WIDTH = 960
+ASPECT_RATIO = 339 / 960
+
+RESPONSIVE_GEOMETRIES = {
+    image_format: tuple(
+        (f'{width}x{round(width * ASPECT_RATIO)}', {
+            'crop': 'center', 'upscale': False, 'format': image_format,
+        })
+        for width in RESPONSIVE_WIDTHS
+    )
+    for image_format in (*MODERN_FORMATS, FALLBACK_FORMAT)
+}
+# Все размеры, которые используют шаблоны: {% thumbnail %} и
+# {% responsive_image %}.
+THUMBNAIL_GEOMETRIES = tuple(
+    geometry
+    for geometries in RESPONSIVE_GEOMETRIES.values()
+    for geometry in geometries
+)
+
+_executor = None
+_executor_lock = Lock()
+_pending = set()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+    return _executor
+
+
+class DeferredThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl, который не вызывает Pillow во время рендера.
+
+    Если миниатюры ещё нет, шаблон получает оригинал, а генерация
+    уходит в пул потоков.
+    """
+
+    def _prepare(self, file_, geometry_string, options):
+        source = ImageFile(file_)
+        options = dict(options)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return source, ImageFile(name, default.storage), options
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if not file_:
+            return super().get_thumbnail(file_, geometry_string, **options)
+        source, thumbnail, _ = self._prepare(file_, geometry_string, options)
+        cached = default.kvstore.get(thumbnail)
+        if cached:
+            return cached
+        if thumbnail.exists():
+            # Файл уже сгенерирован в пуле, остаётся записать его в kvstore.
+            return super().get_thumbnail(file_, geometry_string, **options)
+        schedule(source, geometry_string, options)
+        return source
+
+    def generate(self, file_, geometry_string, options):
+        """Создаёт файл миниатюры; вызывается в потоке пула, без БД."""
+        source, thumbnail, options = self._prepare(
+            file_, geometry_string, options)
+        if thumbnail.exists():
+            return
+        source_image = default.engine.get_image(source)
+        try:
+            options['image_info'] = default.engine.get_image_info(
+                source_image)
+            self._create_thumbnail(
+                source_image, geometry_string, options, thumbnail)
+            self._create_alternative_resolutions(
+                source_image, geometry_string, options, thumbnail.name)
+        finally:
+            default.engine.cleanup(source_image)
+
+
+def _run(key, file_, geometry_string, options):
+    try:
+        DeferredThumbnailBackend().generate(file_, geometry_string, options)
+    except Exception:
+        logger.warning(
+            'Не удалось создать миниатюру %s', file_.name, exc_info=True)
+    finally:
+        with _executor_lock:
+            _pending.discard(key)
+
+
+def schedule(file_, geometry_string, options):
+    """Ставит миниатюру в очередь пула, повторы одной задачи отбрасываются.
+
+    Передаётся файл, а не имя: хранилище исходника входит в ключ
+    миниатюры sorl.
+    """
+    key = (file_.name, geometry_string, repr(sorted(options.items())))
+    with _executor_lock:
+        if key in _pending:
+            return
+        _pending.add(key)
+    if not settings.THUMBNAIL_WORKERS:
+        _run(key, file_, geometry_string, options)
+        return
+    _get_executor().submit(_run, key, file_, geometry_string, options)
+
+
+def is_ready(image):
+    """Готовы ли все миниатюры картинки, то есть записаны ли в kvstore."""
+    backend = DeferredThumbnailBackend()
+    for geometry_string, options in THUMBNAIL_GEOMETRIES:
+        _, thumbnail, _ = backend._prepare(image, geometry_string, options)
+        if not default.kvstore.get(thumbnail):
+            return False
+    return True
+
+
+def variants(image):
+    """Готовые миниатюры картинки по форматам или None.
+
+    Для каждого формата — список миниатюр по возрастанию ширины без
+    повторов (маленькая картинка не растягивается, и несколько ширин
+    дают один размер). Если хоть одной миниатюры нет, недостающие
+    ставятся в очередь и возвращается None: шаблон покажет оригинал.
+    """
+    backend = DeferredThumbnailBackend()
+    result = {}
+    ready = True
+    for image_format, geometries in RESPONSIVE_GEOMETRIES.items():
+        by_width = {}
+        for geometry_string, options in geometries:
+            thumbnail = backend.get_thumbnail(
+                image, geometry_string, **options)
+            # Вместо неготовой миниатюры бэкенд возвращает оригинал.
+            if thumbnail.name == image.name:
+                ready = False
+            else:
+                by_width.setdefault(thumbnail.width, thumbnail)
+        result[image_format] = [
+            by_width[width] for width in sorted(by_width)
+        ]
+    return result if ready else None
+
+
+def pregenerate(image):
+    """Заранее готовит все размеры миниатюр загруженной картинки."""
+    if image:
+        for geometry_string, options in THUMBNAIL_GEOMETRIES:
+            schedule(image, geometry_string, options)
@@ -0,0 +1,159 @@
+from django.core.cache import cache
+from django.db import connections, transaction
+
+from core.db import PRIMARY, use_primary
+
+from yatube.settings import TIMELINE_FANOUT_LIMIT, TIMELINE_TIMEOUT
+
+from . import follows
+from .cache import get_version, invalidate, versioned_timeout
+from .models import AuthorStats, Post, TimelineEntry
+from .utils import FORWARD, CursorPaginator, after_cursor
+
+CELEBRITIES_PREFIX = 'timeline:celebrities'
+
+# Посты авторов, прошедших отбор where, раскладываются в ленты их
+# подписчиков. Знаменитостей пропускаем: их посты подмешиваются при чтении.
+PUSH_SQL = (
+    '{insert} posts_timelineentry (user_id, post_id, pub_date) '
+    'SELECT f.user_id, p.id, p.pub_date FROM posts_post p '
+    'JOIN posts_follow f ON f.author_id = p.author_id '
+    'WHERE {where} AND NOT EXISTS ('
+    '  SELECT 1 FROM posts_authorstats s'
+    '  WHERE s.user_id = p.author_id AND s.is_celebrity'
+    ') {suffix}'
+)
+
+
+def _push(where, params, using):
+    db = connections[using]
+    sql = PUSH_SQL.format(
+        insert=db.ops.insert_statement(ignore_conflicts=True),
+        where=where,
+        suffix=db.ops.ignore_conflicts_suffix_sql(ignore_conflicts=True),
+    )
+    with db.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def _mark_celebrities(authors, using):
+    """Отмечает авторов, у которых больше TIMELINE_FANOUT_LIMIT подписчиков.
+
+    Отметка не снимается: посты, не разосланные, пока автор был
+    знаменитостью, иначе пропали бы из лент после отписок.
+    """
+    marked = AuthorStats.objects.using(using).filter(
+        user_id__in=authors,
+        is_celebrity=False,
+        followers_count__gt=TIMELINE_FANOUT_LIMIT,
+    ).update(is_celebrity=True)
+    if marked:
+        transaction.on_commit(
+            lambda: invalidate(CELEBRITIES_PREFIX), using=using)
+
+
+def push_post(post, using=PRIMARY):
+    """Fan-out при записи: добавляет пост в ленты подписчиков автора.
+
+    Строки ленты пишутся в той же транзакции, что и пост, поэтому
+    откат поста откатывает и их.
+    """
+    _mark_celebrities([post.author_id], using)
+    _push('p.id = %s', [post.pk], using)
+
+
+def push_posts(after_id, using=PRIMARY):
+    """Раскладывает в ленты все посты с id больше after_id.
+
+    Нужен после массовых вставок в обход сигналов.
+    """
+    _mark_celebrities(
+        Post.objects.using(using).filter(id__gt=after_id).values('author_id'),
+        using,
+    )
+    _push('p.id > %s', [after_id], using)
+
+
+def follow(user_id, author_ids, using=PRIMARY):
+    """Добавляет в ленту читателя посты новых авторов."""
+    author_ids = list(author_ids)
+    _push(
+        'f.user_id = %s AND f.author_id IN ({})'.format(
+            ', '.join(['%s'] * len(author_ids))),
+        [user_id, *author_ids],
+        using,
+    )
+
+
+def unfollow(user_id, author_ids, using=PRIMARY):
+    TimelineEntry.objects.using(using).filter(
+        user_id=user_id, post__author_id__in=list(author_ids)
+    ).delete()
+
+
+def _celebrities():
+    """Отсортированные id авторов, чьи посты подмешиваются при чтении."""
+    key = f'{CELEBRITIES_PREFIX}.{get_version(CELEBRITIES_PREFIX)}'
+    ids = cache.get(key)
+    if ids is None:
+        with use_primary():
+            ids = sorted(
+                AuthorStats.objects.filter(is_celebrity=True)
+                .values_list('user_id', flat=True)
+            )
+        transaction.on_commit(
+            lambda: cache.set(key, ids, versioned_timeout(TIMELINE_TIMEOUT)),
+            using=PRIMARY)
+    return ids
+
+
+def followed_celebrities(user_id):
+    following = follows.get_following(user_id)
+    return [
+        author_id for author_id in _celebrities()
+        if follows.contains(following, author_id)
+    ]
+
+
+class TimelinePaginator(CursorPaginator):
+    """Страницы ленты подписок из таблицы TimelineEntry.
+
+    Строки ленты читаются по индексу (user, pub_date, post), так что
+    страница стоит одинаково при любом числе подписок. Посты
+    знаменитостей в ленты не рассылаются и подмешиваются при чтении.
+    """
+
+    def __init__(self, object_list, per_page, user, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.entries = TimelineEntry.objects.filter(user_id=user.pk)
+        self.celebrities = followed_celebrities(user.pk)
+
+    def _fetch(self, ids, extra_rows, reverse):
+        posts = self.object_list.model.objects.select_related(
+            'author', 'group').in_bulk(ids)
+        posts.update((post.pk, post) for post in extra_rows)
+        rows = sorted(
+            posts.values(), key=self._position, reverse=reverse
+        )
+        return rows[:self.per_page + 1]
+
+    def _rows(self, cursor):
+        ids = list(
+            after_cursor(self.entries, cursor, 'post_id')
+            .values_list('post_id', flat=True)[:self.per_page + 1]
+        )
+        extra_rows = []
+        if self.celebrities:
+            extra_rows = super()._rows(cursor, self.object_list.filter(
+                author_id__in=self.celebrities))
+        return self._fetch(ids, extra_rows, cursor[0] == FORWARD)
+
+    def _offset_rows(self, offset):
+        if self.celebrities:
+            return super()._offset_rows(offset)
+        ids = list(
+            self.entries.order_by('-pub_date', '-post_id')
+            .values_list('post_id', flat=True)
+            [offset:offset + self.per_page + 1]
+        )
+        return self._fetch(ids, [], True)
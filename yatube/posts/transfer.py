@@ -0,0 +1,186 @@
+import csv
+import json
+from datetime import datetime
+from itertools import islice
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from . import timeline
+from .cache import INDEX_PAGE_PREFIX, feed_prefix, invalidate
+from .counters import reconcile
+from .models import Group, Post, User
+from .search import deferred_post_index
+
+FIELDS = ('text', 'author', 'group', 'pub_date', 'image')
+FORMATS = ('ndjson', 'csv')
+INSERT_FIELDS = (
+    'text', 'author', 'group', 'pub_date', 'updated_at', 'image',
+    'comments_count',
+)
+BATCH_SIZE = 20000
+CHUNK_SIZE = 2000
+
+
+def guess_format(path, default='ndjson'):
+    if path and path.lower().endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def export_rows(posts):
+    """Посты словарями FIELDS, по CHUNK_SIZE строк за запрос."""
+    rows = posts.order_by('pk').values_list(
+        'text', 'author__username', 'group__slug', 'pub_date', 'image'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    for text, author, group, pub_date, image in rows:
+        yield {
+            'text': text,
+            'author': author,
+            'group': group or '',
+            'pub_date': pub_date.isoformat(),
+            'image': image or '',
+        }
+
+
+def write(rows, stream, fmt):
+    """Пишет строки в поток, возвращает их число."""
+    count = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, FIELDS)
+        writer.writeheader()
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+        return count
+    for count, row in enumerate(rows, 1):
+        stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+    return count
+
+
+def read(stream, fmt):
+    """Строки файла словарями; неразборчивая строка NDJSON даёт None."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else None
+
+
+def _parse_date(value):
+    if not value:
+        return timezone.now()
+    date = datetime.fromisoformat(value)
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date, timezone.utc)
+    return date
+
+
+class Importer:
+    """Пакетная загрузка постов.
+
+    Авторы и группы ищутся в словарях username -> id и slug -> id, так что
+    в памяти держатся только эти словари и один пакет строк. Пакет
+    вставляется одним executemany: bulk_create тратит большую часть
+    времени на сборку SQL по 142 строки (лимит переменных SQLite).
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, using=DEFAULT_DB_ALIAS):
+        self.batch_size = batch_size
+        self.using = using
+        self.authors = dict(
+            User.objects.using(using).values_list('username', 'pk'))
+        self.groups = dict(
+            Group.objects.using(using).values_list('slug', 'pk'))
+        self.imported = 0
+        self.skipped = 0
+        self.author_ids = set()
+        self.group_ids = set()
+        db = connections[using]
+        self.adapt_date = db.ops.adapt_datetimefield_value
+        quote = db.ops.quote_name
+        columns = [
+            quote(Post._meta.get_field(name).column) for name in INSERT_FIELDS
+        ]
+        self.sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(Post._meta.db_table),
+            ', '.join(columns),
+            ', '.join(['%s'] * len(columns)),
+        )
+        # Посты пакета — те, чей id больше максимального до вставки.
+        self.last_id_sql = 'SELECT coalesce(max(id), 0) FROM {}'.format(
+            quote(Post._meta.db_table))
+
+    def _values(self, row, now):
+        """Кортеж для INSERT или None, если строку нужно пропустить."""
+        if row is None:
+            self.skipped += 1
+            return None
+        author_id = self.authors.get(row.get('author'))
+        group = row.get('group') or None
+        group_id = self.groups.get(group) if group else None
+        try:
+            pub_date = self.adapt_date(_parse_date(row.get('pub_date')))
+        except (TypeError, ValueError):
+            pub_date = None
+        if not row.get('text') or author_id is None or pub_date is None or (
+                group and group_id is None):
+            self.skipped += 1
+            return None
+        self.author_ids.add(author_id)
+        if group_id:
+            self.group_ids.add(group_id)
+        return (
+            row['text'],
+            author_id,
+            group_id,
+            pub_date,
+            now,
+            row.get('image') or '',
+            0,
+        )
+
+    def run(self, rows):
+        now = self.adapt_date(timezone.now())
+        values = (
+            value for value in (self._values(row, now) for row in rows)
+            if value
+        )
+        db = connections[self.using]
+        # Пакеты коммитятся по одному, поэтому счётчики и кэши
+        # пересчитываются и после ошибки на середине файла.
+        try:
+            while True:
+                batch = list(islice(values, self.batch_size))
+                if not batch:
+                    break
+                with transaction.atomic(using=self.using), \
+                        deferred_post_index(self.using), \
+                        db.cursor() as cursor:
+                    cursor.execute(self.last_id_sql)
+                    last_id = cursor.fetchone()[0]
+                    cursor.executemany(self.sql, batch)
+                    timeline.push_posts(last_id, using=self.using)
+                self.imported += len(batch)
+        finally:
+            self.finish()
+        return self.imported
+
+    def finish(self):
+        # Вставка идёт в обход сигналов: счётчики, кэш главной и RSS-ленты
+        # обновляются здесь одним проходом. Ленты подписчиков заполняются
+        # в транзакции каждого пакета.
+        if not self.author_ids:
+            return
+        reconcile(user_ids=list(self.author_ids), post_ids=[])
+        invalidate(INDEX_PAGE_PREFIX)
+        invalidate(feed_prefix())
+        for author_id in self.author_ids:
+            invalidate(feed_prefix(author_id=author_id))
+        for group_id in self.group_ids:
+            invalidate(feed_prefix(group_id=group_id))
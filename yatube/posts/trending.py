@@ -0,0 +1,134 @@
+"""Популярные посты (по свежим комментариям) и группы (по свежим постам).
+
+Вес события — 2 ** (t / TRENDING_HALF_LIFE), то есть он вдвое меньше
+у события на период полураспада старше. Чтобы числа не росли без
+предела, время делится на поколения длиной в период: счёт строки хранится
+относительно начала её поколения, событие текущего поколения весит от 1
+до 2. Событие одним UPDATE переводит строку в текущее поколение (умножая
+счёт на 2 ** -k, где k — число прошедших поколений) и прибавляет свой вес.
+
+Рейтинг читает только таблицы PostTrend и GroupTrend, сводя счета к
+текущему поколению тем же выражением. Строки старше TRENDING_GENERATIONS
+поколений считаются нулевыми, их удаляет команда compact_trending.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.utils import timezone
+
+from yatube.settings import (TRENDING_GENERATIONS, TRENDING_HALF_LIFE,
+                             TRENDING_MIN_SCORE)
+
+from .models import Comment, GroupTrend, Post, PostTrend
+
+
+def _generation(now):
+    return int(now.timestamp() // TRENDING_HALF_LIFE)
+
+
+def _weight(when, generation):
+    return 2 ** (when.timestamp() / TRENDING_HALF_LIFE - generation)
+
+
+def _decayed(generation):
+    """Счёт строки, приведённый к поколению generation."""
+    return Case(
+        *[
+            When(generation=generation - age, then=F('score') * 2 ** -age)
+            for age in range(TRENDING_GENERATIONS)
+        ],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def _bump(model, pk, when):
+    generation = _generation(timezone.now())
+    rows = model.objects.filter(pk=pk)
+    values = {
+        'score': _decayed(generation) + _weight(when, generation),
+        'generation': generation,
+    }
+    if not rows.update(**values):
+        # Строки ещё нет: пустая строка вставляется без конфликта с
+        # параллельным запросом, счёт прибавляет тот же UPDATE.
+        model.objects.bulk_create([model(pk=pk)], ignore_conflicts=True)
+        rows.update(**values)
+
+
+def comment_added(comment):
+    _bump(PostTrend, comment.post_id, comment.pub_date)
+
+
+def post_added(post):
+    if post.group_id:
+        _bump(GroupTrend, post.group_id, post.pub_date)
+
+
+def _ranked(trends, limit):
+    generation = _generation(timezone.now())
+    return list(
+        trends.filter(generation__gt=generation - TRENDING_GENERATIONS)
+        .annotate(rank=_decayed(generation))
+        .filter(rank__gte=TRENDING_MIN_SCORE)
+        .order_by('-rank')[:limit]
+    )
+
+
+def top_posts(limit):
+    trends = PostTrend.objects.select_related('post__author', 'post__group')
+    return [trend.post for trend in _ranked(trends, limit)]
+
+
+def top_groups(limit):
+    trends = GroupTrend.objects.select_related('group')
+    return [trend.group for trend in _ranked(trends, limit)]
+
+
+def compact(now=None):
+    """Приводит счета к текущему поколению и удаляет затухшие строки.
+
+    Возвращает число удалённых строк.
+    """
+    generation = _generation(now or timezone.now())
+    deleted = 0
+    for model in (PostTrend, GroupTrend):
+        with transaction.atomic():
+            model.objects.filter(generation__lt=generation).update(
+                score=_decayed(generation), generation=generation)
+            deleted += model.objects.filter(
+                score__lt=TRENDING_MIN_SCORE).delete()[0]
+    return deleted
+
+
+def rebuild(now=None):
+    """Пересчитывает счета по комментариям и постам за окно рейтинга.
+
+    Нужна после массовой загрузки в обход сигналов; читает таблицы
+    комментариев и постов, поэтому запускается командой, а не запросом.
+    """
+    now = now or timezone.now()
+    generation = _generation(now)
+    since = now - timedelta(
+        seconds=TRENDING_HALF_LIFE * TRENDING_GENERATIONS)
+    sources = (
+        (PostTrend, 'post_id',
+         Comment.objects.filter(pub_date__gte=since)
+         .values_list('post_id', 'pub_date')),
+        (GroupTrend, 'group_id',
+         Post.objects.filter(pub_date__gte=since, group__isnull=False)
+         .values_list('group_id', 'pub_date')),
+    )
+    for model, field, rows in sources:
+        scores = Counter()
+        for pk, when in rows.iterator():
+            scores[pk] += _weight(when, generation)
+        with transaction.atomic():
+            model.objects.all().delete()
+            model.objects.bulk_create(
+                model(**{field: pk}, score=score, generation=generation)
+                for pk, score in scores.items()
+                if score >= TRENDING_MIN_SCORE
+            )
@@ -1,8 +1,6 @@
 from django.urls import path
-from django.conf import settings
-from django.conf.urls.static import static
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
@@ -10,6 +8,8 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('search/', views.search, name='search'),
+    path('trending/', views.trending, name='trending'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='edit'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
@@ -18,6 +18,10 @@ urlpatterns = [
         'posts/<int:post_id>/comment/',
         views.add_comment, name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments, name='post_comments'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
     path(
         'profile/<str:username>/follow/',
@@ -29,9 +33,15 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path('follow/batch/', views.follow_batch, name='follow_batch'),
+    path('unfollow/batch/', views.unfollow_batch, name='unfollow_batch'),
+    path('feeds/<str:kind>/', feeds.index_feed, name='index_feed'),
+    path(
+        'group/<slug:slug>/feeds/<str:kind>/',
+        feeds.group_feed, name='group_feed'
+    ),
+    path(
+        'profile/<str:username>/feeds/<str:kind>/',
+        feeds.profile_feed, name='profile_feed'
+    ),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
@@ -1,9 +1,162 @@
-from django.core.paginator import Paginator
-from yatube.settings import POSTS_PER_PAGE
+import base64
+import binascii
+from datetime import datetime
 
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
 
-def get_page_obj(request, posts):
-    paginator = Paginator(posts, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    return page_obj
+from yatube.settings import COMMENTS_PER_PAGE, POSTS_PER_PAGE
+
+FORWARD = 'n'
+BACKWARD = 'p'
+
+
+def encode_cursor(direction, position=None):
+    """Упаковывает направление и позицию (pub_date, id) в токен."""
+    raw = direction
+    if position is not None:
+        pub_date, pk = position
+        raw = f'{direction}|{pub_date.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Разбирает токен курсора, для битого токена возвращает None."""
+    try:
+        raw = base64.urlsafe_b64decode(
+            token + '=' * (-len(token) % 4)
+        ).decode()
+        direction, *position = raw.split('|')
+        if direction not in (FORWARD, BACKWARD):
+            return None
+        if not position:
+            return direction, None
+        pub_date, pk = position
+        return direction, (datetime.fromisoformat(pub_date), int(pk))
+    except (ValueError, TypeError, UnicodeDecodeError, binascii.Error):
+        return None
+
+
+def after_cursor(queryset, cursor, pk_name='id'):
+    """Строки queryset после позиции курсора в порядке его направления.
+
+    Ключ — (pub_date, pk_name); pk_name должно быть уникальным.
+    """
+    direction, position = cursor
+    if direction == FORWARD:
+        rows = queryset.order_by('-pub_date', f'-{pk_name}')
+        if position is not None:
+            pub_date, pk = position
+            # Отдельное условие pub_date__lte даёт поиск по индексу,
+            # одно лишь OR приводит к сканированию.
+            rows = rows.filter(
+                Q(pub_date__lt=pub_date) | Q(**{f'{pk_name}__lt': pk}),
+                pub_date__lte=pub_date,
+            )
+    else:
+        rows = queryset.order_by('pub_date', pk_name)
+        if position is not None:
+            pub_date, pk = position
+            rows = rows.filter(
+                Q(pub_date__gt=pub_date) | Q(**{f'{pk_name}__gt': pk}),
+                pub_date__gte=pub_date,
+            )
+    return rows
+
+
+class CursorPaginator(Paginator):
+    """Постраничная навигация по ключу (pub_date, id) без OFFSET и COUNT.
+
+    Состояние текущей страницы хранится в пагинаторе: next_cursor и
+    previous_cursor — готовые токены для ссылок шаблона.
+    """
+    ordering = ('-pub_date', '-id')
+    last_cursor = encode_cursor(BACKWARD)
+
+    def __init__(self, object_list, per_page, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    @property
+    def has_other_pages(self):
+        return bool(self.next_cursor or self.previous_cursor)
+
+    def _position(self, obj):
+        return obj.pub_date, obj.pk
+
+    def _rows(self, cursor, object_list=None):
+        """Выбирает per_page + 1 строк по ключу после позиции курсора."""
+        if object_list is None:
+            object_list = self.object_list
+        return list(after_cursor(object_list, cursor)[:self.per_page + 1])
+
+    def _offset_rows(self, offset):
+        return list(
+            self.object_list.order_by(*self.ordering)
+            [offset:offset + self.per_page + 1]
+        )
+
+    def get_cursor_page(self, token):
+        cursor = decode_cursor(token) if token else None
+        if cursor is None:
+            cursor = (FORWARD, None)
+        direction, position = cursor
+        rows = self._rows(cursor)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == BACKWARD:
+            rows.reverse()
+            has_next = True
+            has_previous = has_more
+            if position is None:
+                has_next = False
+        else:
+            has_next = has_more
+            has_previous = position is not None
+        if rows:
+            if has_next:
+                self.next_cursor = encode_cursor(
+                    FORWARD, self._position(rows[-1]))
+            if has_previous:
+                self.previous_cursor = encode_cursor(
+                    BACKWARD, self._position(rows[0]))
+        return Page(rows, None, self)
+
+    def get_page(self, number):
+        """Совместимость со ссылками вида ?page=N: OFFSET без COUNT."""
+        try:
+            number = max(int(number), 1)
+        except (TypeError, ValueError):
+            number = 1
+        if number == 1:
+            page = self.get_cursor_page(None)
+            page.number = number
+            return page
+        rows = self._offset_rows((number - 1) * self.per_page)
+        if not rows:
+            return self.get_cursor_page(self.last_cursor)
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            self.next_cursor = encode_cursor(
+                FORWARD, self._position(rows[-1]))
+        self.previous_cursor = encode_cursor(
+            BACKWARD, self._position(rows[0]))
+        return Page(rows, number, self)
+
+
+def get_page_obj(request, posts, paginator_class=CursorPaginator,
+                 per_page=POSTS_PER_PAGE, **kwargs):
+    paginator = paginator_class(posts, per_page, **kwargs)
+    cursor = request.GET.get('cursor')
+    if cursor or 'page' not in request.GET:
+        return paginator.get_cursor_page(cursor)
+    return paginator.get_page(request.GET.get('page'))
+
+
+def get_comments_page(request, post):
+    return get_page_obj(
+        request,
+        post.comments.select_related('author'),
+        per_page=COMMENTS_PER_PAGE,
+    )
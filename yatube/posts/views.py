@@ -1,13 +1,31 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.cache import cache_page
-
-from .utils import get_page_obj
-from .models import Post, Group, User, Follow
+from django.db import transaction
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+
+from core.concurrency import fetch_concurrently
+
+from yatube.settings import (FOLLOW_BATCH_LIMIT, TRENDING_GROUPS,
+                             TRENDING_POSTS)
+
+from .cache import INDEX_PAGE_PREFIX, cache_page_until_changed
+from .conditional import (conditional_page, group_meta, index_meta,
+                          post_detail_meta, profile_meta)
+from .counters import get_stats
+from .follows import (follow_authors, get_following, is_following,
+                      unfollow_authors)
+from .search import search_groups, search_posts
+from .thumbnails import pregenerate
+from .timeline import TimelinePaginator
+from .trending import top_groups, top_posts
+from .utils import get_comments_page, get_page_obj
+from .models import Post, Group, User
 from .forms import PostForm, CommentForm, GroupForm
 
 
-@cache_page(20, key_prefix='index_page')
+@conditional_page(index_meta)
+@cache_page_until_changed(INDEX_PAGE_PREFIX)
 def index(request):
     template = 'posts/index.html'
     posts = Post.objects.select_related('author', 'group')
@@ -17,6 +35,7 @@ def index(request):
     return render(request, template, context)
 
 
+@conditional_page(group_meta)
 def group_posts(request, slug):
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
@@ -28,32 +47,74 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@conditional_page(profile_meta)
 def profile(request, username):
     template = 'posts/profile.html'
-    author = get_object_or_404(User, username=username)
-    posts = Post.objects.select_related('author', 'group').filter(
-        author=author)
-    following = False
-    if request.user.is_authenticated and request.user.follower.filter(
-            author=author).exists():
-        following = True
+    # Автор и страница постов ищутся по username независимо друг от
+    # друга, поэтому запросы к БД идут одновременно.
+    author, page_obj = fetch_concurrently(
+        lambda: get_object_or_404(
+            User.objects.select_related('stats'), username=username),
+        lambda: get_page_obj(
+            request,
+            Post.objects.select_related('author', 'group').filter(
+                author__username=username),
+        ),
+    )
+    following = (request.user.is_authenticated
+                 and is_following(request.user.pk, author.pk))
     context = {
         'author': author,
-        'page_obj': get_page_obj(request, posts),
+        'author_stats': get_stats(author),
+        'page_obj': page_obj,
         'following': following,
     }
     return render(request, template, context)
 
 
+@conditional_page(post_detail_meta)
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), id=post_id)
     form = CommentForm()
-    comments = post.comments.all()
     context = {
         'post': post,
+        'author_stats': get_stats(post.author),
         'form': form,
-        'comments': comments,
+        'comments': get_comments_page(request, post),
+    }
+    return render(request, template, context)
+
+
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    context = {
+        'post': post,
+        'comments': get_comments_page(request, post),
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+def trending(request):
+    template = 'posts/trending.html'
+    context = {
+        'posts': top_posts(TRENDING_POSTS),
+        'groups': top_groups(TRENDING_GROUPS),
+    }
+    return render(request, template, context)
+
+
+def search(request):
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    cursor = request.GET.get('cursor')
+    posts, next_cursor = search_posts(query, cursor)
+    context = {
+        'query': query,
+        'groups': [] if cursor else search_groups(query),
+        'posts': posts,
+        'next_cursor': next_cursor,
     }
     return render(request, template, context)
 
@@ -68,12 +129,14 @@ def group_create(request):
 
 
 @login_required
+@transaction.atomic
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        transaction.on_commit(lambda: pregenerate(post.image))
         return redirect('posts:profile', username=request.user.username)
     return render(request, 'posts/create_post.html', {'form': form})
 
@@ -90,13 +153,16 @@ def post_edit(request, post_id):
         instance=post,
     )
     if form.is_valid():
-        form.save()
+        post = form.save()
+        if 'image' in form.changed_data:
+            transaction.on_commit(lambda: pregenerate(post.image))
         return redirect('posts:post_detail', post_id=post_id)
     return render(request, 'posts/create_post.html', {'form': form,
                                                       'is_edit': True})
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -112,26 +178,49 @@ def add_comment(request, post_id):
 def follow_index(request):
     template = 'posts/follow.html'
     posts = Post.objects.select_related('author', 'group').filter(
-        author__following__user=request.user)
+        author_id__in=list(get_following(request.user.pk)))
     context = {
-        'page_obj': get_page_obj(request, posts),
+        'page_obj': get_page_obj(
+            request, posts, TimelinePaginator, user=request.user),
     }
     return render(request, template, context)
 
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    if request.user != author:
-        Follow.objects.get_or_create(
-            user=request.user,
-            author=author,
-        )
+    author = get_object_or_404(User.objects.only('id'), username=username)
+    follow_authors(request.user, [author.pk])
     return redirect('posts:profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
-    Follow.objects.filter(user=request.user, author=author).delete()
+    author = get_object_or_404(User.objects.only('id'), username=username)
+    unfollow_authors(request.user, [author.pk])
     return redirect('posts:profile', username=username)
+
+
+def _batch_follow_view(change):
+    @login_required
+    @require_POST
+    def view(request):
+        usernames = request.POST.getlist('author')
+        if len(usernames) > FOLLOW_BATCH_LIMIT:
+            return JsonResponse(
+                {'detail': f'Не больше {FOLLOW_BATCH_LIMIT} авторов.'},
+                status=400, json_dumps_params={'ensure_ascii': False},
+            )
+        authors = dict(User.objects.filter(
+            username__in=usernames).values_list('username', 'pk'))
+        changed = change(request.user, authors.values())
+        return JsonResponse({
+            'changed': changed,
+            'not_found': [name for name in usernames if name not in authors],
+        })
+    return view
+
+
+# Пакетная подписка и отписка (например, при онбординге):
+# POST author=<username>&author=<username>...
+follow_batch = _batch_follow_view(follow_authors)
+unfollow_batch = _batch_follow_view(unfollow_authors)
@@ -0,0 +1,79 @@
+import base64
+import hashlib
+from collections import OrderedDict
+
+from django.contrib.auth.hashers import BasePasswordHasher, mask_hash
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_noop as _
+
+
+class ScryptPasswordHasher(BasePasswordHasher):
+    """scrypt из hashlib, в формате ScryptPasswordHasher Django 4.0.
+
+    Цена задаётся памятью (128 * block_size * work_factor байт, 16 МБ по
+    умолчанию), а не только временем CPU, поэтому перебор на GPU
+    дороже, чем у PBKDF2 той же длительности. Хеши совместимы с
+    встроенным хешером новых версий Django.
+    """
+    algorithm = 'scrypt'
+    work_factor = 2 ** 14
+    block_size = 8
+    parallelism = 1
+    maxmem = 0
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        assert password is not None
+        assert salt and '$' not in salt
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        hash = hashlib.scrypt(
+            password.encode(), salt=salt.encode(), n=n, r=r, p=p,
+            maxmem=self.maxmem, dklen=64,
+        )
+        hash = base64.b64encode(hash).decode('ascii').strip()
+        return '%s$%d$%s$%d$%d$%s' % (self.algorithm, n, salt, r, p, hash)
+
+    def decode(self, encoded):
+        algorithm, n, salt, r, p, hash = encoded.split('$', 5)
+        assert algorithm == self.algorithm
+        return {
+            'algorithm': algorithm,
+            'work_factor': int(n),
+            'salt': salt,
+            'block_size': int(r),
+            'parallelism': int(p),
+            'hash': hash,
+        }
+
+    def verify(self, password, encoded):
+        decoded = self.decode(encoded)
+        encoded_2 = self.encode(
+            password, decoded['salt'], decoded['work_factor'],
+            decoded['block_size'], decoded['parallelism'],
+        )
+        return constant_time_compare(encoded, encoded_2)
+
+    def safe_summary(self, encoded):
+        decoded = self.decode(encoded)
+        return OrderedDict([
+            (_('algorithm'), decoded['algorithm']),
+            (_('work factor'), decoded['work_factor']),
+            (_('block size'), decoded['block_size']),
+            (_('parallelism'), decoded['parallelism']),
+            (_('salt'), mask_hash(decoded['salt'])),
+            (_('hash'), mask_hash(decoded['hash'])),
+        ])
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        return (
+            decoded['work_factor'] != self.work_factor
+            or decoded['block_size'] != self.block_size
+            or decoded['parallelism'] != self.parallelism
+        )
+
+    def harden_runtime(self, password, encoded):
+        # Время scrypt нельзя добрать дополнительными раундами, как у
+        # PBKDF2.
+        pass
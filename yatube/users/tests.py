@@ -1,10 +1,14 @@
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import Client, SimpleTestCase, TestCase
 from django.urls import reverse
 
 from http import HTTPStatus
 
 from .forms import CreationForm
+from .hashers import ScryptPasswordHasher
 
 User = get_user_model()
 
@@ -119,3 +123,41 @@ class PostURLTests(TestCase):
                 email='test@yandex.ru',
             ).exists()
         )
+
+
+class ScryptPasswordHasherTest(SimpleTestCase):
+    def test_encode_verify(self):
+        """Хеш scrypt проверяется и хранит свои параметры."""
+        encoded = make_password('secret', hasher='scrypt')
+        self.assertTrue(encoded.startswith('scrypt$16384$'))
+        self.assertTrue(check_password('secret', encoded))
+        self.assertFalse(check_password('wrong', encoded))
+        self.assertFalse(ScryptPasswordHasher().must_update(encoded))
+        with mock.patch.object(ScryptPasswordHasher, 'work_factor', 2 ** 15):
+            self.assertTrue(ScryptPasswordHasher().must_update(encoded))
+
+
+class PasswordUpgradeTest(TestCase):
+    def login(self, user):
+        response = self.client.post(reverse('users:login'), {
+            'username': user.username, 'password': 'secret',
+        })
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        user.refresh_from_db()
+        return user.password
+
+    def test_old_hash_upgraded_on_login(self):
+        """При входе пароль PBKDF2 перешифровывается первым хешером."""
+        user = User.objects.create(
+            username='old-user',
+            password=make_password('secret', hasher='pbkdf2_sha256'),
+        )
+        self.assertTrue(self.login(user).startswith('scrypt$'))
+
+    def test_weak_parameters_upgraded_on_login(self):
+        """Хеш с устаревшей ценой scrypt пересчитывается при входе."""
+        with mock.patch.object(ScryptPasswordHasher, 'work_factor', 2 ** 10):
+            user = User.objects.create_user(
+                username='weak-user', password='secret')
+        self.assertTrue(user.password.startswith('scrypt$1024$'))
+        self.assertTrue(self.login(user).startswith('scrypt$16384$'))
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -18,6 +19,7 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -29,6 +31,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryProfilingMiddleware',
+    'core.middleware.PrimaryPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -44,7 +48,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.profiling.ProfilingTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -66,6 +70,36 @@ DATABASES = {
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
 }
+# Реплика только для чтения, например копия базы в отдельном файле:
+# DATABASE_REPLICA_NAME=replica.sqlite3 python manage.py runserver
+if os.environ.get('DATABASE_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['DATABASE_REPLICA_NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.db.PrimaryReplicaRouter']
+# Сколько секунд после записи пользователь читает из основной базы
+PRIMARY_PIN_SECONDS = 10
+PRIMARY_PIN_COOKIE = 'primary_pin'
+# Потоки для одновременных чтений в представлениях (0 — по очереди).
+# Для локального файла SQLite выигрыша нет, только накладные расходы.
+# Пулу нужен CONN_MAX_AGE > 0 у всех баз, см. core.checks.
+CONCURRENT_FETCH_WORKERS = (
+    0 if DATABASES['default']['ENGINE'].endswith('sqlite3') else 8
+)
+
+# Первым хешером шифруются новые пароли; хеши остальных (и хеши с
+# устаревшими параметрами) перешифровываются им при следующем входе.
+# Argon2 требует пакет argon2-cffi и нужен только для проверки его хешей,
+# пока он не стоит первым. Цену хешеров сравнивает benchmarks.login.
+PASSWORD_HASHERS = [
+    'users.hashers.ScryptPasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -106,6 +140,9 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
 MODEL_STR_METHOD_LENGHT = 15
 
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
@@ -114,9 +151,82 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# За nginx — 'core.media.XAccelRedirectBackend' и internal-локация
+# MEDIA_ACCEL_PREFIX с alias на MEDIA_ROOT; за Apache —
+# 'core.media.XSendfileBackend'
+MEDIA_SERVE_BACKEND = 'core.media.FileResponseBackend'
+MEDIA_ACCEL_PREFIX = '/internal-media/'
+MEDIA_MAX_AGE = 60 * 60 * 24 * 365
+
+# Загрузки пишутся во временные файлы, файл больше UPLOAD_MAX_SIZE байт
+# отбрасывается
+FILE_UPLOAD_HANDLERS = ['core.uploads.LimitedUploadHandler']
+UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+# Картинка проверяется по заголовку до декодирования
+IMAGE_UPLOAD_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+IMAGE_UPLOAD_MAX_PIXELS = 40_000_000
+
+THUMBNAIL_BACKEND = 'posts.thumbnails.DeferredThumbnailBackend'
+# 0 — генерировать миниатюры синхронно (используется в тестах)
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_QUALITY = 80
+
+# Доля профилируемых запросов (0 — выключено, 1 — каждый запрос)
+PROFILING_SAMPLE_RATE = 0.01
+PROFILING_BUFFER_SIZE = 1000
+PROFILING_DUPLICATE_THRESHOLD = 3
 
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    # Замеры пишут процессы сервера, а читает команда profiling_report,
+    # поэтому буфер должен быть общим для процессов.
+    'profiling': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'yatube_profiling'),
+        'OPTIONS': {'MAX_ENTRIES': PROFILING_BUFFER_SIZE + 1},
+    },
+    # Сессии обязаны видеть все процессы: выход из аккаунта должен
+    # сбросить сессию везде. Файловый кэш общий в пределах машины, на
+    # нескольких машинах нужен memcached или redis (проверка core.E001
+    # не даёт указать здесь LocMemCache).
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'yatube_sessions'),
+    },
 }
+
+SESSION_ENGINE = 'core.sessions'
+SESSION_CACHE_ALIAS = 'sessions'
+# Неизменившаяся сессия переписывается в БД, только если строке там
+# осталось жить меньше этого
+SESSION_DB_REFRESH_AGE = 60 * 60 * 24
+SESSION_CLEANUP_BATCH_SIZE = 1000
+
+PAGE_CACHE_TIMEOUT = 60 * 60
+# Потолок таймаутов для данных со сбросом по версии, если кэш default у
+# каждого процесса свой: смену версии видит только процесс, изменивший
+# данные, и остальные отдают старое до истечения таймаута.
+LOCAL_CACHE_TIMEOUT = 15
+PAGE_CACHE_LOCK_TIMEOUT = 30
+POST_CARD_TIMEOUT = 60 * 60 * 24
+
+# Посты авторов с большим числом подписчиков не рассылаются в ленты
+TIMELINE_FANOUT_LIMIT = 1000
+TIMELINE_TIMEOUT = 60 * 60 * 24 * 7
+FOLLOWING_TIMEOUT = 60 * 60 * 24 * 7
+FOLLOW_BATCH_LIMIT = 100
+
+# Вес комментария или поста в рейтинге популярного вдвое падает за период
+TRENDING_HALF_LIFE = 60 * 60 * 6
+# Через столько периодов событие перестаёт учитываться
+TRENDING_GENERATIONS = 10
+TRENDING_MIN_SCORE = 0.01
+TRENDING_POSTS = 10
+TRENDING_GROUPS = 10
+
+FEED_ITEMS = 20
+# Больше FEED_ITEMS постов JSON-лента отдаёт потоком, без кэша
+FEED_MAX_ITEMS = 100000
+FEED_CHUNK_SIZE = 500
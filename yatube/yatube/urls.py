@@ -2,12 +2,19 @@ from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 
+from core import media
+
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('api/v1/', include('api.urls', namespace='api')),
+    path(
+        f'{settings.MEDIA_URL.lstrip("/")}<path:path>',
+        media.serve, name='media'
+    ),
 ]
 
 handler403 = 'core.views.csrf_failure'